@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Классификация условий полёта (VFR/MVFR/IFR/LIFR) и проверка минимумов
+по выходу decode_metar.
+Станции обрабатываются пакетом в колоночном виде, результаты кэшируются
+по идентичности сводки, поэтому неизменившиеся станции не пересчитываются.
+"""
+
+from array import array
+
+from main7 import decode_metar, visibility_meters, cloud_model, FT_TO_M, SM_TO_M
+
+INF = float('inf')
+
+# ==============================
+# Границы категорий (FAA), ceiling в футах, видимость в статутных милях
+# ==============================
+# (категория, нижняя граница ceiling, нижняя граница видимости) — от худшей к лучшей
+CATEGORY_LIMITS = (
+    ('LIFR', 500, 1),    # ниже 500 ft или ниже 1 SM
+    ('IFR', 1000, 3),    # ниже 1000 ft или ниже 3 SM
+    ('MVFR', 3000, 5),   # до 3000 ft включительно или до 5 SM включительно
+)
+# Видимость в SM декодируется в метры с округлением (5SM -> 8047 м): допуск на сравнение
+SM_TOLERANCE = 0.001
+CATEGORY_ORDER = {'VFR': 0, 'MVFR': 1, 'IFR': 2, 'LIFR': 3}
+
+CAVOK_VISIBILITY_M = 10000
+
+
+# ==============================
+# Извлечение признаков из словаря сводки
+# ==============================
+def report_features(metar_data: dict) -> tuple[float, float, float]:
+    """
+    Возвращает (преобладающая видимость м, нижняя граница облаков ft, минимальная RVR м).
+    Отсутствующее значение — бесконечность (не ограничивает условия).
+    """
+    vis = INF
+    prevailing, _ = visibility_meters(metar_data)
+    if prevailing is not None:
+        vis = float(CAVOK_VISIBILITY_M) if prevailing >= 9999 else float(prevailing)
+
+    ceiling = INF
+    model = metar_data.get('cloud_summary') or cloud_model(metar_data)
+    if model:
+        if model['cavok']:
+            vis = min(vis, float(CAVOK_VISIBILITY_M))
+        if model['ceiling_ft'] is not None:
+            ceiling = float(model['ceiling_ft'])
+
+    rvr = INF
+    for r in metar_data.get('rvr', []):
+        digits = r['value_raw'].lstrip('PM')
+        if digits.isdigit():
+            # RVR в футах (профиль FAA) переводится в метры
+            rvr = min(rvr, float(digits) * (FT_TO_M if r.get('unit') == 'FT' else 1.0))
+    return vis, ceiling, rvr
+
+
+def report_identity(metar_data: dict) -> tuple:
+    """
+    Идентичность сводки: станция, срок наблюдения, признак исправления, тип (METAR/SPECI)
+    и отпечаток текста (main7.report_digest, decode_metar(..., derived=True)) — разные
+    сводки одного срока не совпадают. Без отпечатка его заменяют исходные группы,
+    по которым считаются признаки (видимость, облачность, VV, RVR).
+    """
+    digest = metar_data.get('digest')
+    if digest is None:
+        digest = (metar_data.get('visibility', {}).get('raw'),
+                  tuple(c['raw'] for c in metar_data.get('clouds', ())),
+                  metar_data.get('vertical_visibility', {}).get('raw'),
+                  tuple(r['raw'] for r in metar_data.get('rvr', ())))
+    return (metar_data.get('station', {}).get('code'),
+            metar_data.get('time', {}).get('raw'),
+            metar_data.get('correction'),
+            metar_data.get('report_type'),
+            digest)
+
+
+# ==============================
+# Классификация по колонкам
+# ==============================
+def categorize(vis: float, ceiling: float) -> str:
+    """vis — видимость в метрах, ceiling — нижняя граница облаков в футах."""
+    vis_sm = vis / SM_TO_M
+    for name, ceil_lim, vis_lim in CATEGORY_LIMITS:
+        if name == 'MVFR':
+            if ceiling <= ceil_lim or vis_sm <= vis_lim + SM_TOLERANCE:
+                return name
+        elif ceiling < ceil_lim or vis_sm < vis_lim - SM_TOLERANCE:
+            return name
+    return 'VFR'
+
+
+def categorize_columns(vis_col, ceil_col) -> list[str]:
+    """Категории для колонок видимости и нижней границы облаков одинаковой длины."""
+    return [categorize(v, c) for v, c in zip(vis_col, ceil_col)]
+
+
+def minima_columns(vis_col, ceil_col, rvr_col, minima: dict) -> list[bool]:
+    """
+    Проверка колонок против одного профиля минимумов:
+    {'ceiling_ft': ..., 'visibility_m': ..., 'rvr_m': ...} (любой ключ может отсутствовать).
+    RVR, если передана, заменяет видимость, как это принято для посадочных минимумов.
+    """
+    min_ceil = minima.get('ceiling_ft', 0)
+    min_vis = minima.get('visibility_m', 0)
+    min_rvr = minima.get('rvr_m', min_vis)
+    return [c >= min_ceil and (r >= min_rvr if r != INF else v >= min_vis)
+            for v, c, r in zip(vis_col, ceil_col, rvr_col)]
+
+
+class FlightCategoryEngine:
+    """
+    Пакетный классификатор. profiles — {станция: {имя_профиля: минимумы}},
+    default_profiles применяются к станциям без собственной таблицы.
+    """
+
+    def __init__(self, profiles: dict | None = None, default_profiles: dict | None = None):
+        self.profiles = profiles or {}
+        self.default_profiles = default_profiles or {}
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def set_profiles(self, profiles: dict, default_profiles: dict | None = None):
+        self.profiles = profiles
+        if default_profiles is not None:
+            self.default_profiles = default_profiles
+        self._cache.clear()
+
+    def classify(self, reports: list[dict]) -> list[dict]:
+        """
+        Классифицирует список словарей decode_metar. Возвращает по записи на сводку:
+        {'station', 'category', 'visibility_m', 'ceiling_ft', 'rvr_m', 'minima': {профиль: bool}}.
+        """
+        results = [None] * len(reports)
+        todo = []
+        for idx, data in enumerate(reports):
+            ident = report_identity(data)
+            cached = self._cache.get(ident[0])
+            if cached is not None and cached[0] == ident:
+                results[idx] = cached[1]
+                self.hits += 1
+            else:
+                todo.append((idx, ident, data))
+        self.misses += len(todo)
+        if not todo:
+            return results
+
+        vis_col, ceil_col, rvr_col = array('d'), array('d'), array('d')
+        for _, _, data in todo:
+            v, c, r = report_features(data)
+            vis_col.append(v)
+            ceil_col.append(c)
+            rvr_col.append(r)
+        categories = categorize_columns(vis_col, ceil_col)
+
+        # Группируем станции по таблице профилей, чтобы проверять каждый профиль одним проходом
+        by_table = {}
+        for pos, (_, ident, _) in enumerate(todo):
+            table = self.profiles.get(ident[0], self.default_profiles)
+            by_table.setdefault(id(table), (table, []))[1].append(pos)
+        minima_out = [dict() for _ in todo]
+        for table, positions in by_table.values():
+            sub_v = [vis_col[p] for p in positions]
+            sub_c = [ceil_col[p] for p in positions]
+            sub_r = [rvr_col[p] for p in positions]
+            for name, minima in table.items():
+                for p, ok in zip(positions, minima_columns(sub_v, sub_c, sub_r, minima)):
+                    minima_out[p][name] = ok
+
+        for pos, (idx, ident, _) in enumerate(todo):
+            res = {
+                'station': ident[0],
+                'category': categories[pos],
+                'visibility_m': None if vis_col[pos] == INF else vis_col[pos],
+                'ceiling_ft': None if ceil_col[pos] == INF else ceil_col[pos],
+                'rvr_m': None if rvr_col[pos] == INF else rvr_col[pos],
+                'minima': minima_out[pos],
+            }
+            results[idx] = res
+            if ident[0] is not None:
+                self._cache[ident[0]] = (ident, res)
+        return results
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    samples = [
+        "METAR ULLI 191700Z 29008MPS 2200 0900SE R28L/1900U R28R/2000U +SHSN BLSN SCT011 BKN019CB OVC033 M06/M07 Q0996=",
+        "METAR URMM 021630Z 11005MPS 4400 -SHRA BR BKN004 OVC021CB 12/11 Q1023=",
+        "METAR ULMM 261330Z 22005G12MPS 9999 -SHRASN BKN028CB 03/M02 Q1000=",
+    ]
+    engine = FlightCategoryEngine(
+        profiles={'ULLI': {'CAT I': {'ceiling_ft': 200, 'visibility_m': 800, 'rvr_m': 550}}},
+        default_profiles={'NPA': {'ceiling_ft': 400, 'visibility_m': 1500}},
+    )
+    decoded = [decode_metar(s)[1] for s in samples]
+    for r in engine.classify(decoded):
+        print(r)
+    engine.classify(decoded)
+    print(f"cache hits={engine.hits} misses={engine.misses}")
+
+    # Границы в статутных милях и разные сводки одной станции за один срок
+    checks = [
+        ("METAR KJFK 261351Z 31015KT 5SM FEW200 12/10 A2992", 'MVFR'),
+        ("METAR KJFK 261351Z 31015KT 6SM FEW200 12/10 A2992", 'VFR'),
+        ("METAR KJFK 261351Z 31015KT 3SM FEW200 12/10 A2992", 'MVFR'),
+        ("METAR KJFK 261351Z 31015KT 2 3/4SM FEW200 12/10 A2992", 'IFR'),
+        ("METAR KJFK 261351Z 31015KT 1SM FEW200 12/10 A2992", 'IFR'),
+        ("METAR KJFK 261351Z 31015KT 3/4SM FEW200 12/10 A2992", 'LIFR'),
+        ("METAR KJFK 261351Z 31015KT 10SM FEW200 12/10 A2992", 'VFR'),
+        ("SPECI KJFK 261351Z 31015KT 1/2SM FG OVC002 12/10 A2992", 'LIFR'),
+        ("METAR KJFK 261351Z 31015KT 1/2SM FG OVC002 12/10 A2992", 'LIFR'),
+    ]
+    engine = FlightCategoryEngine()
+    for s, expected in checks:
+        got = engine.classify([decode_metar(s)[1]])[0]['category']
+        print(f"{got:<5} {s}")
+        assert got == expected, (s, got, expected)
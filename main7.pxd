@@ -0,0 +1,29 @@
+# cython: language_level=3
+# Дополняющие объявления Cython для main7.py (сборка metar_accel.py build).
+# main7.py остаётся чистым Python; при компиляции Cython берёт отсюда типы
+# аргументов и локальных переменных сканеров групп — индексы и длины становятся
+# целыми C, а проверки символов не создают промежуточных объектов.
+# Сканеры остаются вызываемыми из Python (cpdef): декодер обращается к ним через SCAN.
+
+cimport cython
+
+cpdef tuple _scan_time(str t)
+
+@cython.locals(n=Py_ssize_t, k=Py_ssize_t, g=Py_ssize_t)
+cpdef tuple _scan_wind(str t)
+
+@cython.locals(n=Py_ssize_t)
+cpdef tuple _scan_vis(str t)
+
+@cython.locals(k=Py_ssize_t)
+cpdef tuple _scan_cloud(str t)
+
+@cython.locals(n=Py_ssize_t)
+cpdef bint _temp_value(str part)
+
+@cython.locals(k=Py_ssize_t)
+cpdef tuple _scan_temp(str t)
+
+cpdef object _scan_pressure(str t, str letter)
+
+cpdef dict parse_weather_token(str tok)
@@ -7,8 +7,15 @@ METAR / SPECI / TAF Decoder (RU)
 """
 
 import re
+import math
+import hashlib
+from array import array
 import json # Добавлен импорт для красивого вывода словаря
 
+# Версия формата вывода decode_metar. Увеличивается при любом изменении текста
+# или структуры словаря — по ней сбрасываются сохранённые результаты (см. metar_cache.py).
+DECODER_VERSION = '7.13'
+
 # ==============================
 # ЦЕНТРАЛИЗОВАННЫЕ СЛОВАРИ ДАННЫХ
 # ==============================
@@ -100,7 +107,10 @@ RE_TIME = re.compile(r'^\d{6}Z$')
 RE_WIND = re.compile(r'^(?P<dir>\d{3}|VRB|000)(?P<spd>\d{2,3})(G(?P<gust>\d{2,3}))?(?P<unit>KT|MPS|KMH)?$')
 RE_VARWIND = re.compile(r'^(?P<from>\d{3})V(?P<to>\d{3})$')
 RE_VIS = re.compile(r'^(?P<vis>\d{4})(?P<dir>[NSEW]{1,2})?$')
+RE_VIS_SM = re.compile(r'^(?P<q>[PM])?(?:(?P<whole>\d{1,2})|(?P<num>\d{1,2})/(?P<den>\d{1,2}))SM$')
 RE_RVR = re.compile(r'^R(?P<rwy>\d{2}[LRC]?)/(?P<val>[PM]?\d{4})(V(?P<max>\d{4}))?(?P<trend>[UDN])?$')
+# RVR в футах (практика США/Канады): R04R/2400V4000FT, R04R/P6000FT, R04R/1800FT/D
+RE_RVR_FT = re.compile(r'^R(?P<rwy>\d{2}[LRC]?)/(?P<val>[PM]?\d{4})(V(?P<max>[PM]?\d{4}))?FT/?(?P<trend>[UDN])?$')
 RE_CLOUD = re.compile(r'^(FEW|SCT|BKN|OVC|NSC|SKC|CLR|CAVOK)(\d{3}|///)?(CB|TCU)?$')
 RE_VV = re.compile(r'^VV(\d{3}|///)$')
 RE_TEMP = re.compile(r'^(M?\d{2}|//)/(M?\d{2}|//)$')
@@ -114,6 +124,187 @@ RE_WEATHER = re.compile(
     r'((?:MI|BC|PR|DR|BL|SH|TS|FZ|RE)|(?:DZ|RA|SN|SG|IC|PL|GR|GS|UP|BR|FG|FU|VA|DU|SA|HZ|PY|PO|SQ|DS|SS))+$'
 )
 
+# ==============================
+# Сканеры частых групп
+# ==============================
+# Посимвольный разбор групп времени, ветра, видимости, облачности, температуры и давления
+# без создания объектов совпадения. Множество принимаемых токенов совпадает с
+# соответствующим регулярным выражением (проверка и замеры — metar_scan.py);
+# set_scanners(False) переключает декодер на разбор регулярными выражениями.
+# isdecimal() принимает те же символы, что и \d.
+CLOUD_COVER_CODES = frozenset(('FEW', 'SCT', 'BKN', 'OVC', 'NSC', 'SKC', 'CLR'))
+# Первые символы групп облачности (включая CAVOK) — быстрый отсев в цикле декодера
+CLOUD_LEAD = frozenset(code[0] for code in CLOUD_COVER_CODES | {'CAVOK'})
+WIND_UNITS = frozenset(('KT', 'MPS', 'KMH'))
+
+def _scan_time(t: str):
+    """'261330Z' -> (день, час, минута)."""
+    if len(t) == 7 and t[6] == 'Z' and t[:6].isdecimal():
+        return int(t[0:2]), int(t[2:4]), int(t[4:6])
+    return None
+
+def _scan_wind(t: str):
+    """'22005G12MPS' -> ('220', 5, 12, 'MPS'); порыв и единица — None, если их нет."""
+    n = len(t)
+    if n < 5:
+        return None
+    d = t[:3]
+    if d != 'VRB' and not d.isdecimal():
+        return None
+    k = 3
+    while k < n and t[k].isdecimal():
+        k += 1
+    if not 2 <= k - 3 <= 3:
+        return None
+    spd = int(t[3:k])
+    gust = None
+    if k < n and t[k] == 'G':
+        g = k = k + 1
+        while k < n and t[k].isdecimal():
+            k += 1
+        if not 2 <= k - g <= 3:
+            return None
+        gust = int(t[g:k])
+    if k == n:
+        return d, spd, gust, None
+    unit = t[k:]
+    return (d, spd, gust, unit) if unit in WIND_UNITS else None
+
+def _scan_vis(t: str):
+    """'0900SE' -> (900, 'SE'); направление — None, если его нет."""
+    n = len(t)
+    if not 4 <= n <= 6 or not t[:4].isdecimal():
+        return None
+    for c in t[4:]:
+        if c not in 'NSEW':
+            return None
+    return int(t[:4]), t[4:] or None
+
+def _scan_cloud(t: str):
+    """'BKN028CB' -> ('BKN', '028', 'CB'); отсутствующие части — None."""
+    if t[:3] in CLOUD_COVER_CODES:
+        grp, k = t[:3], 3
+    elif t[:5] == 'CAVOK':
+        grp, k = 'CAVOK', 5
+    else:
+        return None
+    hhh = t[k:k + 3]
+    if hhh == '///' or (len(hhh) == 3 and hhh.isdecimal()):
+        k += 3
+    else:
+        hhh = None
+    extra = t[k:]
+    if not extra:
+        return grp, hhh, None
+    return (grp, hhh, extra) if extra == 'CB' or extra == 'TCU' else None
+
+def _temp_value(part: str) -> bool:
+    """Часть группы температуры: 'dd', 'Mdd' или '//'."""
+    n = len(part)
+    if n == 2:
+        return part == '//' or part.isdecimal()
+    return n == 3 and part[0] == 'M' and part[1:].isdecimal()
+
+def _scan_temp(t: str):
+    """'M06/M07' -> ('M06', 'M07'); части возвращаются как в сводке ('//' — нет данных)."""
+    if not 5 <= len(t) <= 7:
+        return None
+    k = 2 if t[:2] == '//' else t.find('/')
+    if k < 2 or t[k] != '/':
+        return None
+    T, Td = t[:k], t[k + 1:]
+    if _temp_value(T) and _temp_value(Td):
+        return T, Td
+    return None
+
+def _scan_pressure(t: str, letter: str):
+    if len(t) == 5 and t[0] == letter and t[1:].isdecimal():
+        return int(t[1:])
+    return None
+
+def _scan_qnh(t: str):
+    """'Q1009' -> 1009."""
+    return _scan_pressure(t, 'Q')
+
+def _scan_altimeter(t: str):
+    """'A2992' -> 2992 (сотые inHg)."""
+    return _scan_pressure(t, 'A')
+
+# Эталонные варианты на регулярных выражениях (те же результаты)
+def _re_time(t: str):
+    return (int(t[0:2]), int(t[2:4]), int(t[4:6])) if RE_TIME.match(t) else None
+
+def _re_wind(t: str):
+    m = RE_WIND.match(t)
+    if not m:
+        return None
+    g = m.group('gust')
+    return m.group('dir'), int(m.group('spd')), int(g) if g else None, m.group('unit')
+
+def _re_vis(t: str):
+    m = RE_VIS.match(t)
+    return (int(m.group('vis')), m.group('dir')) if m else None
+
+def _re_cloud(t: str):
+    m = RE_CLOUD.match(t)
+    return m.groups() if m else None
+
+def _re_temp(t: str):
+    m = RE_TEMP.match(t)
+    return m.groups() if m else None
+
+def _re_qnh(t: str):
+    m = RE_Q.match(t)
+    return int(m.group(1)) if m else None
+
+def _re_altimeter(t: str):
+    m = RE_A.match(t)
+    return int(m.group(1)) if m else None
+
+SCANNERS = {
+    'time': (_scan_time, _re_time),
+    'wind': (_scan_wind, _re_wind),
+    'vis': (_scan_vis, _re_vis),
+    'cloud': (_scan_cloud, _re_cloud),
+    'temp': (_scan_temp, _re_temp),
+    'qnh': (_scan_qnh, _re_qnh),
+    'altimeter': (_scan_altimeter, _re_altimeter),
+}
+
+# Группы, где регулярное выражение быстрее сканера (замеры metar_scan.py)
+REGEX_PREFERRED = frozenset(('temp',))
+
+class GroupScanners:
+    """
+    Выбранные реализации разбора групп (атрибуты — функции токен -> поля или None).
+    Декодер обращается к ним через SCAN.time(t), SCAN.wind(t) ..., поэтому переключение
+    реализации не требует подмены функций модуля.
+    """
+    __slots__ = ('enabled', 'time', 'wind', 'vis', 'cloud', 'temp', 'qnh', 'altimeter')
+
+    def __init__(self, enabled: bool = True):
+        self.select(enabled)
+
+    def select(self, enabled: bool = True):
+        """Сканеры (enabled=True, кроме REGEX_PREFERRED) или регулярные выражения."""
+        self.enabled = enabled
+        def pick(name):
+            scanner, regex = SCANNERS[name]
+            return scanner if enabled and name not in REGEX_PREFERRED else regex
+        self.time = pick('time')
+        self.wind = pick('wind')
+        self.vis = pick('vis')
+        self.cloud = pick('cloud')
+        self.temp = pick('temp')
+        self.qnh = pick('qnh')
+        self.altimeter = pick('altimeter')
+
+SCAN = GroupScanners()
+
+def set_scanners(enabled: bool = True):
+    """Выбор реализации разбора групп: сканеры (по умолчанию) или регулярные выражения."""
+    SCAN.select(enabled)
+
 # ==============================
 # ФУНКЦИИ-помощники для грамматики (адаптированы под новую структуру)
 # ==============================
@@ -218,47 +409,118 @@ def join_weather_events(events, descriptors, sign):
 # ==============================
 # ### REFACTORED: Основной декодер токена погоды ###
 # ==============================
-def decode_weather_token(tok: str) -> str:
+# Флаги опасных явлений: отчётная маска — побитовое ИЛИ по всем группам явлений
+HAZ_THUNDERSTORM = 1 << 0
+HAZ_FREEZING = 1 << 1
+HAZ_FOG = 1 << 2
+HAZ_SNOW = 1 << 3
+HAZ_HAIL = 1 << 4
+HAZ_SQUALL = 1 << 5
+HAZ_VOLCANIC_ASH = 1 << 6
+HAZ_DUST_SAND_STORM = 1 << 7
+HAZ_BLOWING_SNOW = 1 << 8
+HAZ_ICE_PELLETS = 1 << 9
+HAZ_RAIN = 1 << 10
+HAZ_DRIZZLE = 1 << 11
+HAZ_MIST = 1 << 12
+HAZ_HEAVY = 1 << 13
+HAZ_SHOWERS = 1 << 14
+
+HAZARD_BY_CODE = {
+    'TS': HAZ_THUNDERSTORM, 'FZ': HAZ_FREEZING, 'FG': HAZ_FOG, 'SN': HAZ_SNOW, 'SG': HAZ_SNOW,
+    'GR': HAZ_HAIL, 'GS': HAZ_HAIL, 'SQ': HAZ_SQUALL, 'VA': HAZ_VOLCANIC_ASH,
+    'DS': HAZ_DUST_SAND_STORM, 'SS': HAZ_DUST_SAND_STORM, 'BLSN': HAZ_BLOWING_SNOW | HAZ_SNOW,
+    'DRSN': HAZ_SNOW, 'PL': HAZ_ICE_PELLETS, 'IC': HAZ_ICE_PELLETS, 'RA': HAZ_RAIN,
+    'DZ': HAZ_DRIZZLE, 'BR': HAZ_MIST, 'SH': HAZ_SHOWERS,
+}
+
+def parse_weather_token(tok: str) -> dict:
     """
-    Парсит токен погоды (например '-SHRASN') с помощью regex, без ручного перебора.
+    Разбирает группу явлений в коды: интенсивность ('+', '-', ''), дескрипторы
+    (MI, BC, PR, DR, BL, SH, TS, FZ), явления (RA, SN, ..., а также BLSN/DRSN),
+    признаки 'вблизи' (VC) и 'недавний' (RE) и маску опасных явлений.
     """
-    if not tok:
-        return ''
-
     sign = ''
     if tok.startswith(('+', '-')):
         sign = tok[0]
         tok = tok[1:]
 
-    events = []
+    phenomena = []
     descriptors = []
+    vicinity = recent = False
 
     # 1. Обрабатываем составные коды, которые могут быть неверно разделены
     if 'BLSN' in tok:
-        events.append(WEATHER_DATA['BLSN']['name'])
+        phenomena.append('BLSN')
         tok = tok.replace('BLSN', '')
     if 'DRSN' in tok:
-        events.append(WEATHER_DATA['DRSN']['name'])
+        phenomena.append('DRSN')
         tok = tok.replace('DRSN', '')
 
     # 2. Используем findall для извлечения всех кодов
-    codes = re.findall(r'[A-Z]{2}', tok)
-    
-    for code in codes:
-        if code in DESCRIPTORS_DATA:
-            descriptors.append(DESCRIPTORS_DATA[code]['name'])
+    for code in re.findall(r'[A-Z]{2}', tok):
+        if code == 'VC':
+            vicinity = True
+        elif code == 'RE':
+            recent = True
+        elif code in DESCRIPTORS_DATA:
+            descriptors.append(code)
         elif code in WEATHER_DATA:
-            events.append(WEATHER_DATA[code]['name'])
+            phenomena.append(code)
+
+    hazards = HAZ_HEAVY if sign == '+' else 0
+    for code in descriptors + phenomena:
+        hazards |= HAZARD_BY_CODE.get(code, 0)
+    return {'intensity': sign, 'descriptors': descriptors, 'phenomena': phenomena,
+            'vicinity': vicinity, 'recent': recent, 'hazards': hazards}
+
+def render_weather(codes: dict) -> str:
+    """Русская фраза по результату parse_weather_token."""
+    descr_codes = (['VC'] if codes['vicinity'] else []) + (['RE'] if codes['recent'] else []) + codes['descriptors']
+    descriptors = [DESCRIPTORS_DATA[c]['name'] for c in descr_codes]
+    events = [WEATHER_DATA[c]['name'] for c in codes['phenomena']]
+    return join_weather_events(events, descriptors, codes['intensity'])
+
+def decode_weather_token(tok: str) -> str:
+    """
+    Парсит токен погоды (например '-SHRASN') с помощью regex, без ручного перебора.
+    """
+    if not tok:
+        return ''
+    return render_weather(parse_weather_token(tok))
 
-    return join_weather_events(events, descriptors, sign)
+def weather_codes(entry: dict) -> dict:
+    """
+    Коды записи 'weather' словаря decode_metar: сохранённые при derived=True
+    или разобранные из 'raw' по запросу.
+    """
+    return entry if 'phenomena' in entry else parse_weather_token(entry['raw'])
+
+def block_hazards(block: dict) -> tuple[int, int, int]:
+    """
+    Маски опасных явлений блока: (наблюдаемые, вблизи аэродрома VC, недавние RE).
+    """
+    current = vicinity = recent = 0
+    for w in block.get('weather', ()):
+        if w['raw'] == 'NSW':
+            continue
+        codes = weather_codes(w)
+        h = codes['hazards']
+        if codes['recent']:
+            recent |= h
+        elif codes['vicinity']:
+            vicinity |= h
+        else:
+            current |= h
+    return current, vicinity, recent
 
 # ==============================
 # Функции-декодеры ВПП и облаков (без изменений)
 # ==============================
 def decode_cloud(tok: str) -> str:
-    m = RE_CLOUD.match(tok)
+    m = SCAN.cloud(tok)
     if not m: return tok
-    grp, hhh, extra = m.groups()
+    grp, hhh, extra = m
     desc = CLOUDS.get(grp, grp)
     if grp == 'CAVOK': return desc
     if hhh:
@@ -268,6 +530,9 @@ def decode_cloud(tok: str) -> str:
     cloud_type = f" {CLOUD_TYPES.get(extra, extra)}" if extra else ""
     return f"{desc}{base}{cloud_type}"
 
+# Толщина отложений: коды 92–98 означают сантиметры, 99 — ВПП не работает
+RUNWAY_DEPTH_MM = {92: 100, 93: 150, 94: 200, 95: 250, 96: 300, 97: 350, 98: 400}
+
 def decode_braking(brake):
     if brake in BRAKING:
         return f"  Сцепление: {BRAKING[brake]}"
@@ -282,109 +547,830 @@ def runway_header(rwy: str) -> str:
     if rwy == "99": return "Состояние ВПП: повтор из предыдущего сообщения"
     return f"Состояние ВПП {rwy}:"
 
-def decode_runway_digits(rwy, d):
-    Er, Cr, thick, brake = d[0], d[1], d[2:4], d[4:6]
-    res = [runway_header(rwy)]
-    res.append(f"  Тип покрытия: {RUNWAY_TYPE.get(Er, Er)}")
-    res.append(f"  Степень покрытия: {RUNWAY_COVER.get(Cr, Cr)}")
-    if thick == '//':
-        res.append("  Толщина: нет данных")
-    else:
-        try:
-            iv = int(thick)
-            if iv == 0: res.append("  Толщина: <1 мм")
-            elif 1 <= iv <= 90: res.append(f"  Толщина: {iv} мм")
-            elif iv == 92: res.append("  Толщина: 10 см")
-            elif iv == 93: res.append("  Толщина: 15 см")
-            elif iv == 94: res.append("  Толщина: 20 см")
-            elif iv == 98: res.append("  Толщина: 40 см")
-            elif iv == 99: res.append("  Толщина: ВПП не работает")
-            else: res.append(f"  Толщина: код {thick}")
-        except:
-            res.append("  Толщина: нет данных")
-    res.append(decode_braking(brake))
-    return "\n".join(res)
+def runway_record(raw: str, kind: str, rwy=None) -> dict:
+    """
+    Единственная запись на группу состояния ВПП. Поля, не переданные в группе, — None.
+    kind: 'digits' | 'body' | 'cleared' | 'closed' | 'snoclo' | 'cleaning'
+    """
+    return {
+        'raw': raw, 'kind': kind, 'runway': rwy,
+        'all_runways': rwy == '88', 'repeat': rwy == '99',
+        'deposit': None, 'coverage': None, 'depth_code': None, 'depth_mm': None,
+        'braking_code': None, 'friction': None,
+        'closed': kind in ('closed', 'cleaning', 'snoclo'), 'cleared': kind == 'cleared',
+    }
 
-def decode_runway_body(rwy, body):
-    res = [runway_header(rwy)]
-    if len(body) >= 4:
-        brake = body[-2:]; core = body[:-2]
-        if core and core[0].isdigit():
-            res.append(f"  Тип покрытия: {RUNWAY_TYPE.get(core[0], core[0])}")
-        if len(core) > 1 and core[1].isdigit():
-            res.append(f"  Степень покрытия: {RUNWAY_COVER.get(core[1], core[1])}")
-        if "//" in core:
-            res.append("  Толщина: нет данных")
-        elif len(core) >= 3 and core[2:].isdigit():
-            res.append(f"  Толщина: {int(core[2:])} мм")
-        res.append(decode_braking(brake))
-    else:
-        res.append(f"  Код состояния: {body}")
-    return "\n".join(res)
+def _fill_depth(rec: dict, thick: str):
+    rec['depth_code'] = thick
+    if thick.isdigit():
+        iv = int(thick)
+        if iv <= 90: rec['depth_mm'] = iv
+        elif iv == 99: rec['closed'] = True
+        else: rec['depth_mm'] = RUNWAY_DEPTH_MM.get(iv)
+
+def _fill_braking(rec: dict, brake: str):
+    rec['braking_code'] = brake
+    if brake not in BRAKING and brake.isdigit():
+        rec['friction'] = int(brake) / 100.0
+
+def decode_runway_digits(rwy, d) -> dict:
+    """Группа R<ВПП>/ErCrddBB из шести цифр."""
+    rec = runway_record(f"R{rwy}/{d}", 'digits', rwy)
+    rec['deposit'], rec['coverage'] = d[0], d[1]
+    _fill_depth(rec, d[2:4])
+    _fill_braking(rec, d[4:6])
+    return rec
+
+def decode_runway_body(rwy, body) -> dict:
+    """Группа R<ВПП>/... переменной длины (допускает '/' вместо отсутствующих данных)."""
+    rec = runway_record(f"R{rwy}/{body}", 'body', rwy)
+    if len(body) < 4:
+        rec['depth_code'] = body
+        return rec
+    brake = body[-2:]; core = body[:-2]
+    if core and core[0].isdigit():
+        rec['deposit'] = core[0]
+    if len(core) > 1 and core[1].isdigit():
+        rec['coverage'] = core[1]
+    if "//" in core:
+        rec['depth_code'] = '//'
+    elif len(core) >= 3 and core[2:].isdigit():
+        _fill_depth(rec, core[2:])
+    _fill_braking(rec, brake)
+    return rec
 
 def decode_runway(tok: str):
-    if tok.startswith("R") and "CLRD" in tok: return f"Состояние ВПП {tok[1:3]}: очищена"
-    if tok.startswith("R") and "CLSD" in tok: return f"Состояние ВПП {tok[1:3]}: закрыта"
-    if "SNOCLO" in tok: return "Аэродром закрыт снегом"
-    if "RRRR" in tok and "99" in tok: return "ВПП закрыта на чистку"
+    """Разбирает группу состояния ВПП в запись (см. runway_record) или None."""
+    if tok.startswith("R") and "CLRD" in tok: return runway_record(tok, 'cleared', tok[1:3])
+    if tok.startswith("R") and "CLSD" in tok: return runway_record(tok, 'closed', tok[1:3])
+    if "SNOCLO" in tok: return runway_record(tok, 'snoclo')
+    if "RRRR" in tok and "99" in tok: return runway_record(tok, 'cleaning')
     m = RE_RUNWAY6.match(tok)
     if m: return decode_runway_digits(m.group('rwy'), m.group('digits'))
     m = RE_RUNWAY_VAR.match(tok)
     if m: return decode_runway_body(m.group('rwy'), m.group('body'))
     return None
 
+def _depth_text(rec: dict) -> str:
+    code = rec['depth_code']
+    if rec['depth_mm'] is not None:
+        mm = rec['depth_mm']
+        if mm == 0: return "<1 мм"
+        return f"{mm} мм" if mm <= 90 else f"{mm // 10} см"
+    if code.isdigit() and int(code) == 99: return "ВПП не работает"
+    if code.isdigit(): return f"код {code}"
+    return "нет данных"
+
+def render_runway_state(rec: dict) -> str:
+    """Текст состояния ВПП, построенный по полям записи."""
+    kind = rec['kind']
+    if kind == 'cleared': return f"Состояние ВПП {rec['runway']}: очищена"
+    if kind == 'closed': return f"Состояние ВПП {rec['runway']}: закрыта"
+    if kind == 'snoclo': return "Аэродром закрыт снегом"
+    if kind == 'cleaning': return "ВПП закрыта на чистку"
+    res = [runway_header(rec['runway'])]
+    if rec['braking_code'] is None and kind == 'body':
+        res.append(f"  Код состояния: {rec['depth_code']}")
+        return "\n".join(res)
+    if rec['deposit'] is not None:
+        res.append(f"  Тип покрытия: {RUNWAY_TYPE.get(rec['deposit'], rec['deposit'])}")
+    if rec['coverage'] is not None:
+        res.append(f"  Степень покрытия: {RUNWAY_COVER.get(rec['coverage'], rec['coverage'])}")
+    if rec['depth_code'] is not None:
+        res.append(f"  Толщина: {_depth_text(rec)}")
+    res.append(decode_braking(rec['braking_code']))
+    return "\n".join(res)
+
+# ==============================
+# Видимость: разбор группы с просмотром вперёд
+# ==============================
+SM_TO_M = 1609.344
+VIS_QUALIFIERS = {'P': 'above', 'M': 'below'}
+
+def _parse_vis_sm(whole_tok, tok):
+    """Видимость в статутных милях: '10SM', 'P6SM', 'M1/4SM', '1' + '1/2SM'."""
+    m = RE_VIS_SM.match(tok)
+    if not m or (whole_tok and not m.group('num')):
+        return None
+    miles = float(m.group('whole')) if m.group('whole') else int(m.group('num')) / int(m.group('den'))
+    text = m.group('whole') or f"{m.group('num')}/{m.group('den')}"
+    if whole_tok:
+        miles += int(whole_tok)
+        text = f"{whole_tok} {text}"
+    return {'raw': f"{whole_tok} {tok}" if whole_tok else tok, 'meters': round(miles * SM_TO_M),
+            'unit': 'SM', 'statute_miles': round(miles, 3), 'sm_text': text,
+            'qualifier': VIS_QUALIFIERS.get(m.group('q'))}
+
+def parse_visibility(tokens: list[str], i: int):
+    """
+    Разбирает группу видимости, начинающуюся с tokens[i]:
+    преобладающая видимость (метры или мили, в т.ч. из двух токенов "1 1/2SM")
+    и следующая за ней минимальная видимость с направлением ("2200 0900SE").
+    Возвращает (словарь, текст, число поглощённых токенов) или None.
+    """
+    t = tokens[i]
+    nxt = tokens[i + 1] if i + 1 < len(tokens) else ''
+    used = 1
+    m = SCAN.vis(t)
+    if m:
+        vis = {'raw': t, 'meters': m[0], 'unit': 'M', 'qualifier': None}
+        if m[1]:
+            vis['direction'] = m[1]
+    elif len(t) == 1 and t.isdecimal() and nxt.endswith('SM'):
+        vis = _parse_vis_sm(t, nxt)
+        used = 2
+    else:
+        vis = _parse_vis_sm(None, t)
+    if vis is None:
+        return None
+
+    if vis['unit'] == 'SM':
+        sign = {'above': 'более ', 'below': 'менее '}.get(vis['qualifier'], '')
+        text = f"Видимость {sign}{vis.pop('sm_text')} SM ({vis['meters']} м)"
+    elif vis['meters'] == 9999:
+        text = "Видимость ≥10 км"
+    elif 'direction' in vis:
+        text = f"Видимость {vis['meters']} м {vis['direction']}"
+    else:
+        text = f"Видимость минимальная {vis['meters']} м"
+
+    # Минимальная видимость сразу за преобладающей; групп с направлением может быть
+    # несколько ("2000 1200NW 6000SE") — все они сохраняются в 'directional',
+    # а наименьшая становится 'minimum'
+    groups = []
+    while i + used < len(tokens):
+        nxt = tokens[i + used]
+        m = SCAN.vis(nxt)
+        if not m or (groups and not m[1]):
+            break
+        groups.append({'raw': nxt, 'meters': m[0], 'direction': m[1]})
+        vis['raw'] += ' ' + nxt
+        used += 1
+        if not m[1]:
+            break
+    vis['minimum'] = min(groups, key=lambda g: g['meters']) if groups else None
+    if len(groups) > 1:
+        vis['directional'] = groups
+    for g in groups:
+        if g['direction']:
+            text += f", в направлении {g['direction']} — {g['meters']} м"
+        else:
+            text = f"Видимость минимальная {g['meters']} м"
+    return vis, text, used
+
+# ==============================
+# Ремарки (RMK): таблица диспетчеризации
+# ==============================
+class RemarkTable:
+    """
+    Таблица декодеров ремарок.
+    Многословные фразы ('MT OBSC', 'PK WND ...') хранятся в префиксном дереве по токенам,
+    одиночные группы ('QFE...', 'SLP...') — в словаре по буквенному префиксу.
+    Обработчик возвращает (текст, словарь); при разборе каждая позиция проверяется
+    не более чем на длину самой длинной фразы, поэтому разбор линеен по числу токенов.
+    """
+
+    def __init__(self):
+        self.phrases = {}
+        self.prefixes = {}
+        self.prefix_lengths = []
+
+    def register_phrase(self, phrase: str, handler, nargs: int = 0):
+        """phrase — токены через пробел; handler(phrase, args) получает ещё nargs следующих токенов."""
+        node = self.phrases
+        for word in phrase.split():
+            node = node.setdefault(word, {})
+        node[None] = (handler, nargs)
+
+    def register_prefix(self, prefix: str, pattern: str, handler):
+        """Одиночная группа, начинающаяся с prefix и целиком совпадающая с pattern; handler(tok, m)."""
+        self.prefixes.setdefault(prefix, []).append((re.compile(pattern), handler))
+        self.prefix_lengths = sorted({len(p) for p in self.prefixes}, reverse=True)
+
+    def match(self, tokens: list[str], j: int):
+        """Возвращает (текст, словарь, число поглощённых токенов) или None."""
+        node, found = self.phrases, None
+        k = j
+        while k < len(tokens) and tokens[k] in node:
+            node = node[tokens[k]]
+            k += 1
+            if None in node:
+                handler, nargs = node[None]
+                if k + nargs <= len(tokens):
+                    found = (handler, k, nargs)
+        if found:
+            handler, k, nargs = found
+            text, data = handler(' '.join(tokens[j:k]), tokens[k:k + nargs])
+            return text, data, k - j + nargs
+
+        tok = tokens[j]
+        for n in self.prefix_lengths:
+            for regex, handler in self.prefixes.get(tok[:n], ()):
+                m = regex.match(tok)
+                if m:
+                    text, data = handler(tok, m)
+                    return text, data, 1
+        return None
+
+    def decode(self, tokens: list[str]) -> tuple[list[str], list[dict]]:
+        """Декодирует все токены ремарок в строки вывода и список словарей."""
+        lines, decoded = [], []
+        j = 0
+        while j < len(tokens):
+            res = self.match(tokens, j)
+            if res is None:
+                lines.append(f"  - (неизвестная ремарка) {tokens[j]}")
+                decoded.append({'code': tokens[j], 'kind': 'unknown', 'description': 'Неизвестная ремарка'})
+                j += 1
+                continue
+            text, data, used = res
+            lines.append(f"  - {text}")
+            decoded.append(data)
+            j += used
+        return lines, decoded
+
+def _remark_fixed(kind: str, description: str):
+    """Обработчик для фразы без параметров; kind — постоянный код ремарки (не зависит от текста)."""
+    return lambda phrase, args: (description, {'code': phrase, 'kind': kind, 'description': description})
+
+def _remark_qfe(tok, m):
+    mmhg, hpa = m.group(1), m.group(2)
+    text = f"Давление QFE {int(mmhg)} мм рт.ст."
+    data = {'code': tok, 'kind': 'qfe', 'description': 'Давление QFE', 'value': tok[3:], 'mmhg': int(mmhg)}
+    if hpa:
+        text += f" ({int(hpa)} гПа)"
+        data['hpa'] = int(hpa)
+    return text, data
+
+def _remark_qbb(tok, m):
+    return (f"Нижняя граница облаков {m.group(1)} м",
+            {'code': tok, 'kind': 'qbb', 'description': 'Нижняя граница облаков', 'value_m': m.group(1)})
+
+def _remark_slp(tok, m):
+    v = int(m.group(1)) / 10.0
+    hpa = round(v + (1000 if v < 50 else 900), 1)
+    return (f"Давление на уровне моря {hpa:.1f} гПа",
+            {'code': tok, 'kind': 'slp', 'description': 'Давление на уровне моря', 'hpa': hpa})
+
+def _remark_t_group(tok, m):
+    def tenths(sign, digits):
+        return (-1 if sign == '1' else 1) * int(digits) / 10.0
+    t, td = tenths(m.group(1), m.group(2)), tenths(m.group(3), m.group(4))
+    return (f"Температура {t:.1f}°C, точка росы {td:.1f}°C",
+            {'code': tok, 'kind': 'temp_tenths', 'description': 'Температура и точка росы (десятые)',
+             'air_celsius': t, 'dew_point_celsius': td})
+
+def _remark_pk_wnd(phrase, args):
+    m = re.match(r'^(\d{3})(\d{2,3})/(\d{2})?(\d{2})$', args[0])
+    if not m:
+        return (f"Пиковый ветер {args[0]}", {'code': phrase, 'kind': 'pk_wnd', 'description': 'Пиковый ветер', 'value': args[0]})
+    d, spd, hh, mm = m.groups()
+    when = f"{hh}:{mm}" if hh else f"xx:{mm}"
+    return (f"Пиковый ветер {int(d)}° {int(spd)} уз. в {when} UTC",
+            {'code': f"{phrase} {args[0]}", 'kind': 'pk_wnd', 'description': 'Пиковый ветер',
+             'direction': int(d), 'speed': int(spd), 'unit': 'KT',
+             'hour': int(hh) if hh else None, 'minute': int(mm)})
+
+def _remark_precip(tok, m):
+    inches = int(m.group(1)) / 100.0
+    return (f"Осадки за час {inches:.2f} дюйма ({inches * 25.4:.1f} мм)",
+            {'code': tok, 'kind': 'precip_hour', 'description': 'Осадки за час', 'inches': inches, 'mm': round(inches * 25.4, 1)})
+
+# Российская / ИКАО практика
+REMARKS_ICAO = RemarkTable()
+REMARKS_ICAO.register_phrase('MT OBSC', _remark_fixed('mt_obsc', 'Горы закрыты облачностью/осадками'))
+REMARKS_ICAO.register_phrase('OBST OBSC', _remark_fixed('obst_obsc', 'Препятствия закрыты облачностью/осадками'))
+REMARKS_ICAO.register_prefix('QFE', r'^QFE(\d{3,4})(?:/(\d{3,4}))?$', _remark_qfe)
+REMARKS_ICAO.register_prefix('QBB', r'^QBB(\d{2,4})$', _remark_qbb)
+
+# Практика США/Канады (FAA/NWS)
+REMARKS_FAA = RemarkTable()
+REMARKS_FAA.register_phrase('AO1', _remark_fixed('ao1', 'Автоматическая станция без датчика вида осадков'))
+REMARKS_FAA.register_phrase('AO2', _remark_fixed('ao2', 'Автоматическая станция с датчиком вида осадков'))
+REMARKS_FAA.register_phrase('SLPNO', _remark_fixed('slp_missing', 'Давление на уровне моря недоступно'))
+REMARKS_FAA.register_phrase('PRESRR', _remark_fixed('pressure_rising', 'Давление быстро растёт'))
+REMARKS_FAA.register_phrase('PRESFR', _remark_fixed('pressure_falling', 'Давление быстро падает'))
+REMARKS_FAA.register_phrase('TSNO', _remark_fixed('ts_sensor_off', 'Датчик грозы не работает'))
+REMARKS_FAA.register_phrase('PWINO', _remark_fixed('pwi_sensor_off', 'Датчик вида осадков не работает'))
+REMARKS_FAA.register_phrase('FZRANO', _remark_fixed('fzra_sensor_off', 'Датчик переохлаждённого дождя не работает'))
+REMARKS_FAA.register_phrase('PNO', _remark_fixed('precip_gauge_off', 'Осадкомер не работает'))
+REMARKS_FAA.register_phrase('RVRNO', _remark_fixed('rvr_missing', 'Данные RVR недоступны'))
+REMARKS_FAA.register_phrase('$', _remark_fixed('maintenance', 'Станции требуется техническое обслуживание'))
+REMARKS_FAA.register_phrase('PK WND', _remark_pk_wnd, nargs=1)
+REMARKS_FAA.register_prefix('SLP', r'^SLP(\d{3})$', _remark_slp)
+REMARKS_FAA.register_prefix('T', r'^T([01])(\d{3})([01])(\d{3})$', _remark_t_group)
+REMARKS_FAA.register_prefix('P', r'^P(\d{4})$', _remark_precip)
+
+# ==============================
+# Предобработка сводки
+# ==============================
+def tokenize_metar(metar: str) -> list[str]:
+    """
+    Нормализует сводку (убирает '=' и лишние пробелы) и разбивает её на группы.
+    Используется декодером и всеми слоями, которым нужен тот же самый ключ сводки.
+    """
+    return metar.replace("=", "").split()
+
+def report_digest(tokens: list[str], salt: str = '') -> bytes:
+    """
+    16-байтовый отпечаток сводки по группам tokenize_metar — общий ключ идентичности
+    для кэша, дедупликации и отпечатков лент. salt отделяет ключи с разным контекстом.
+    """
+    return hashlib.blake2b(f"{salt}|{' '.join(tokens)}".encode('utf-8'), digest_size=16).digest()
+
+# ==============================
+# Нормализованный числовой блок (единицы СИ)
+# ==============================
+# Коэффициенты перевода скорости ветра в м/с
+WIND_TO_MPS = {'MPS': 1.0, 'KT': 0.514444, 'KMH': 1 / 3.6}
+MPS_TO_KT = 1 / 0.514444
+INHG_TO_HPA = 33.8639
+FT_TO_M = 0.3048
+
+def relative_humidity(t_c, td_c):
+    """Относительная влажность (%) по температуре и точке росы (формула Магнуса)."""
+    if t_c is None or td_c is None:
+        return None
+    a, b = 17.625, 243.04
+    rh = 100.0 * math.exp(a * td_c / (b + td_c) - a * t_c / (b + t_c))
+    return round(min(rh, 100.0), 1)
+
+def visibility_meters(block: dict):
+    """Возвращает (преобладающая, минимальная) видимость в метрах или (None, None)."""
+    vis = block.get('visibility')
+    if not vis:
+        return None, None
+    minimum = vis['minimum']['meters'] if vis.get('minimum') else vis['meters']
+    return vis['meters'], min(vis['meters'], minimum)
+
+def normalize_block(block: dict) -> dict:
+    """
+    Переводит значения блока (основного или тренда) в единые единицы:
+    ветер в м/с и узлах, давление в гПа, высоты в метрах и футах, видимость в метрах.
+    """
+    norm = {}
+    wind = block.get('wind')
+    if wind and 'speed' in wind:
+        k = WIND_TO_MPS.get(wind['unit'], WIND_TO_MPS['KT'])
+        spd = wind['speed'] * k
+        norm['wind_direction_deg'] = wind['direction'] if wind['direction'] != 'VRB' else None
+        norm['wind_speed_mps'] = round(spd, 1)
+        norm['wind_speed_kt'] = round(spd * MPS_TO_KT, 1)
+        if wind['gust'] is not None:
+            norm['wind_gust_mps'] = round(wind['gust'] * k, 1)
+            norm['wind_gust_kt'] = round(wind['gust'] * k * MPS_TO_KT, 1)
+
+    pressure = block.get('pressure')
+    if pressure:
+        if 'qnh_hpa' in pressure:
+            norm['pressure_hpa'] = float(pressure['qnh_hpa'])
+        else:
+            norm['pressure_hpa'] = round(pressure['altimeter_inhg'] * INHG_TO_HPA, 1)
+
+    vis, vis_min = visibility_meters(block)
+    if vis is not None:
+        norm['visibility_m'] = vis
+        norm['visibility_min_m'] = vis_min
+
+    clouds = block.get('clouds')
+    if clouds:
+        heights = [c['height_ft'] for c in clouds if c['height_ft'] is not None]
+        norm['cloud_base_ft'] = heights
+        norm['cloud_base_m'] = [round(h * FT_TO_M) for h in heights]
+
+    vv = block.get('vertical_visibility')
+    if vv and vv['height_m'] is not None:
+        norm['vertical_visibility_m'] = vv['height_m']
+        norm['vertical_visibility_ft'] = int(vv['raw'][2:]) * 100
+
+    temp = block.get('temperature')
+    if temp:
+        norm['air_celsius'] = temp['air_celsius']
+        norm['dew_point_celsius'] = temp['dew_point_celsius']
+        norm['relative_humidity_pct'] = relative_humidity(temp['air_celsius'], temp['dew_point_celsius'])
+    return norm
+
+# ==============================
+# Модель облачности: слои, нижняя граница облаков (ceiling), CB/TCU
+# ==============================
+# Верхняя граница количества облаков в октантах для каждого кода
+CLOUD_OCTAS = {'FEW': 2, 'SCT': 4, 'BKN': 7, 'OVC': 8, 'NSC': 0, 'SKC': 0, 'CLR': 0, 'CAVOK': 0}
+CEILING_CODES = ('BKN', 'OVC')
+
+def cloud_model(block: dict) -> dict | None:
+    """
+    Слои облачности блока, упорядоченные по высоте, нижняя граница облаков
+    (самый низкий слой BKN/OVC или вертикальная видимость), общее количество
+    в октантах и наличие CB/TCU. None, если в блоке нет групп облачности и VV.
+    """
+    clouds = block.get('clouds', [])
+    vv = block.get('vertical_visibility')
+    if not clouds and vv is None:
+        return None
+    layers = sorted(
+        ({'code': c['code'], 'height_ft': c['height_ft'],
+          'height_m': round(c['height_ft'] * FT_TO_M) if c['height_ft'] is not None else None,
+          'octas': CLOUD_OCTAS.get(c['code'], 0), 'type': c['type']}
+         for c in clouds if c['code'] in CLOUD_OCTAS),
+        key=lambda layer: (layer['height_ft'] is None, layer['height_ft'] or 0))
+    ceiling, source = None, None
+    for layer in layers:
+        if layer['code'] in CEILING_CODES and layer['height_ft'] is not None:
+            ceiling, source = layer['height_ft'], layer['code']
+            break
+    octas = max((layer['octas'] for layer in layers), default=0)
+    if vv is not None:
+        octas = 8
+        if vv['raw'][2:].isdigit() and (ceiling is None or int(vv['raw'][2:]) * 100 < ceiling):
+            ceiling, source = int(vv['raw'][2:]) * 100, 'VV'
+    return {
+        'layers': layers,
+        'ceiling_ft': ceiling,
+        'ceiling_m': round(ceiling * FT_TO_M) if ceiling is not None else None,
+        'ceiling_source': source,
+        'total_octas': octas,
+        'has_cb': any(layer['type'] == 'CB' for layer in layers),
+        'has_tcu': any(layer['type'] == 'TCU' for layer in layers),
+        'cavok': any(layer['code'] == 'CAVOK' for layer in layers),
+    }
+
+def batch_ceilings(reports) -> array:
+    """
+    Нижняя граница облаков (ft) для пакета словарей decode_metar в виде array('d');
+    NaN — нижней границы нет (нет слоёв BKN/OVC и VV).
+    """
+    out = array('d')
+    nan = math.nan
+    for data in reports:
+        model = data.get('cloud_summary')
+        if model is None and ('clouds' in data or 'vertical_visibility' in data):
+            model = cloud_model(data)
+        ceiling = model['ceiling_ft'] if model else None
+        out.append(nan if ceiling is None else float(ceiling))
+    return out
+
+# ==============================
+# Тренды: уточнители времени и окно действия
+# ==============================
+# Группы FM/TL/AT уточняют время предшествующего BECMG/TEMPO: (ключ в словаре, предлог)
+TREND_TIME_QUALIFIERS = {'FM': ('from', 'с'), 'TL': ('till', 'до'), 'AT': ('at', 'в')}
+TREND_CHANGE_CODES = ('BECMG', 'TEMPO')
+# Прогноз типа "тренд" действует 2 часа от срока наблюдения
+TREND_VALIDITY_MINUTES = 120
+
+def parse_trend_time(tok: str) -> dict:
+    """Разбирает FMhhmm / TLhhmm / AThhmm (допускается и ddhhmm) в словарь."""
+    qualifier = {'raw': tok}
+    hhmm = tok[2:][-4:]
+    if len(hhmm) == 4 and hhmm.isdigit():
+        qualifier['hour'] = int(hhmm[:2])
+        qualifier['minute'] = int(hhmm[2:])
+    return qualifier
+
+def observation_minute(metar_data: dict):
+    """Срок наблюдения в минутах от начала суток UTC или None."""
+    time = metar_data.get('time')
+    return time['hour'] * 60 + time['minute'] if time else None
+
+def trend_validity(block: dict, obs) -> dict:
+    """
+    Окно действия блока тренда: смещения начала и конца (в минутах от срока
+    наблюдения obs) и, если срок известен, время HHMM UTC. Для BECMG TL/AT задают
+    момент завершения изменения ('complete_min'), после которого новые условия
+    сохраняются до конца срока действия тренда.
+    """
+    offsets = {}
+    if obs is not None:
+        for key, _ in TREND_TIME_QUALIFIERS.values():
+            q = block.get(key)
+            if q and 'hour' in q:
+                offsets[key] = min((q['hour'] * 60 + q['minute'] - obs) % 1440, TREND_VALIDITY_MINUTES)
+    start = offsets.get('from', offsets.get('at', 0))
+    if block.get('code') == 'BECMG':
+        end = TREND_VALIDITY_MINUTES
+        complete = offsets.get('at', offsets.get('till', start))
+    else:
+        end = offsets.get('till', TREND_VALIDITY_MINUTES)
+        complete = start
+    validity = {'start_min': start, 'end_min': end, 'complete_min': complete}
+    if obs is not None:
+        validity['start_utc'] = "%02d%02d" % divmod((obs + start) % 1440, 60)
+        validity['end_utc'] = "%02d%02d" % divmod((obs + end) % 1440, 60)
+    return validity
+
+def resolve_trend_validity(metar_data: dict):
+    """Записывает в каждый блок тренда 'validity' (см. trend_validity)."""
+    obs = observation_minute(metar_data)
+    for block in metar_data.get('trend', []):
+        block['validity'] = trend_validity(block, obs)
+
+def block_conditions(block: dict) -> dict:
+    """
+    Ключевые условия блока (основного или тренда): видимость м, нижняя граница
+    облаков ft (None — нет BKN/OVC/VV), ветер и порывы м/с, коды явлений.
+    В результат попадают только группы, присутствующие в блоке.
+    """
+    cond = {}
+    vis, _ = visibility_meters(block)
+    if vis is not None:
+        cond['visibility_m'] = vis
+    model = block.get('cloud_summary') or cloud_model(block)
+    if model:
+        cond['ceiling_ft'] = model['ceiling_ft']
+        if model['cavok']:
+            cond['visibility_m'] = 9999
+            cond['weather'] = []
+    wind = block.get('wind')
+    if wind and 'speed' in wind:
+        k = WIND_TO_MPS.get(wind['unit'], WIND_TO_MPS['KT'])
+        cond['wind_speed_mps'] = round(wind['speed'] * k, 1)
+        cond['wind_gust_mps'] = round(wind['gust'] * k, 1) if wind['gust'] is not None else None
+    if 'weather' in block:
+        cond['weather'] = [w['raw'] for w in block['weather'] if w['raw'] != 'NSW']
+    return cond
+
+def trend_conditions(metar_data: dict, mode: str = 'worst', horizon_minutes: int = TREND_VALIDITY_MINUTES) -> dict:
+    """
+    Условия на ближайшие horizon_minutes с учётом трендов.
+    mode='expected' — ожидаемые условия к концу горизонта: основной блок с применёнными
+                      BECMG, завершившимися в горизонте (TEMPO не учитываются);
+    mode='worst'    — наихудшее из основного блока и всех BECMG/TEMPO/FM в горизонте:
+                      минимальные видимость и нижняя граница облаков, максимальные ветер
+                      и порывы, объединение явлений.
+    """
+    if mode not in ('worst', 'expected'):
+        raise ValueError(f"Неизвестный режим: {mode}")
+    result = block_conditions(metar_data)
+    obs = observation_minute(metar_data)
+    for block in metar_data.get('trend', []):
+        code = block.get('code', '')
+        validity = block.get('validity') or trend_validity(block, obs)
+        if code == 'NOSIG' or validity['start_min'] >= horizon_minutes or validity['end_min'] <= 0:
+            continue
+        if mode == 'expected' and (code == 'TEMPO' or validity.get('complete_min', 0) >= horizon_minutes):
+            continue
+        cond = block_conditions(block)
+        if mode == 'expected':
+            result.update(cond)
+            continue
+        for key, value in cond.items():
+            old = result.get(key)
+            if key == 'weather':
+                result[key] = (old or []) + [w for w in value if w not in (old or [])]
+            elif key == 'ceiling_ft':
+                if value is not None and (old is None or value < old):
+                    result[key] = value
+            elif key == 'visibility_m':
+                result[key] = value if old is None else min(old, value)
+            elif value is not None:
+                result[key] = value if old is None else max(old, value)
+    return result
+
+# Отметки исправленной (COR) и уточнённой (AMD) сводки
+CORRECTION_MARKS = {'COR': 'Исправленная сводка (COR)', 'AMD': 'Уточнённая сводка (AMD)'}
+
+# ==============================
+# Региональные профили
+# ==============================
+# Профиль задаёт таблицу ремарок, фиксированные группы основной части сводки
+# (текст, ключ в словаре) и набор необязательных групп основной части ('body').
+# Группы ветра, видимости (м и SM), облаков, температуры и давления (Q и A) у профилей
+# общие: синтаксис групп одинаков, различается только практика их применения.
+# Группы состояния ВПП (Rxx/dddddd, R88, R99, SNOCLO) — практика ИКАО/ВМО; в сводках
+# США и Канады их нет (состояние ВПП передаётся в NOTAM), поэтому в профиле FAA такие
+# группы не толкуются по таблицам ВМО, а попадают в неизвестные.
+# Профиль выбирается один раз — по префиксу станции.
+REGIONAL_PROFILES = {
+    'ICAO': {
+        'name': 'ICAO',
+        'remarks': REMARKS_ICAO,
+        'body': frozenset(('runway_state',)),
+        'rvr': (RE_RVR, 'M'),
+        'fixed_tokens': {
+            'AUTO': ("Автоматическое наблюдение", 'auto'),
+            'NIL': ("Сводка отсутствует (NIL)", 'nil'),
+        },
+    },
+    'FAA': {
+        'name': 'FAA',
+        'remarks': REMARKS_FAA,
+        'body': frozenset(),
+        'rvr': (RE_RVR_FT, 'FT'),
+        'fixed_tokens': {
+            'AUTO': ("Автоматическое наблюдение", 'auto'),
+            'NIL': ("Сводка отсутствует (NIL)", 'nil'),
+            '$': ("Станции требуется техническое обслуживание", 'maintenance'),
+        },
+    },
+}
+DEFAULT_PROFILE = 'ICAO'
+# Префиксы индексов ИКАО: K — США, P — Аляска/Гавайи/Тихий океан, C — Канада.
+# Канада (MANOBS) использует тот же формат основной части (SM, A, RMK), что и FAA/NWS;
+# канадские ремарки (балльность слоёв 'SC4AC2' и т.п.) таблицей FAA не разбираются
+# и выводятся как неизвестные.
+PROFILE_BY_PREFIX = {'K': 'FAA', 'P': 'FAA', 'C': 'FAA'}
+
+def select_profile(station: str) -> dict:
+    """Профиль по индексу станции (одно обращение к словарю)."""
+    return REGIONAL_PROFILES[PROFILE_BY_PREFIX.get(station[:1], DEFAULT_PROFILE)]
+
+# ==============================
+# Подключаемые декодеры групп
+# ==============================
+class TokenDecoderRegistry:
+    """
+    Внешние декодеры групп, которые не распознал основной разбор (национальные
+    группы, цветовые коды военных аэродромов и т.п.). Декодер регистрируется на точный
+    токен, префикс или регулярное выражение с приоритетом; handler(tok, m) возвращает
+    (текст, словарь) или None, если группа ему не подходит. Копия словаря с текстом
+    в 'decoded_text' добавляется в список под ключом key текущего блока.
+    Регистрации сводятся в словари по токену и по префиксу; декодеры только
+    с регулярным выражением объединяются в одно выражение-фильтр. Поэтому стоимость
+    проверки группы не растёт линейно с числом декодеров.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._compiled = None
+
+    def __bool__(self):
+        return bool(self._entries)
+
+    def register(self, handler, *, token: str | None = None, prefix: str | None = None,
+                 pattern: str | None = None, priority: int = 0, key: str = 'extensions'):
+        """
+        token   — точное совпадение группы;
+        prefix  — группа начинается с prefix (вместе с pattern — и совпадает с ним целиком);
+        pattern — регулярное выражение для всей группы (m передаётся в handler).
+        Из нескольких подходящих декодеров первым вызывается декодер с большим priority.
+        """
+        if token is None and prefix is None and pattern is None:
+            raise ValueError("Нужен token, prefix или pattern")
+        regex = re.compile(pattern) if pattern is not None else None
+        self._entries.append((priority, len(self._entries), token, prefix, regex, handler, key))
+        self._compiled = None
+
+    def signature(self) -> str:
+        """
+        Короткий отпечаток набора регистраций ('' — реестр пуст): декодеры меняют вывод
+        decode_metar, поэтому сохранённые результаты должны различаться по нему (metar_cache).
+        """
+        if not self._entries:
+            return ''
+        parts = [f"{p}|{token}|{prefix}|{regex.pattern if regex else ''}|"
+                 f"{getattr(handler, '__module__', '')}.{getattr(handler, '__qualname__', repr(handler))}|{key}"
+                 for p, _, token, prefix, regex, handler, key in self._entries]
+        return hashlib.blake2b('\n'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+    def keys(self) -> list[str]:
+        """Ключи словаря сводки, под которые пишут зарегистрированные декодеры."""
+        return list(dict.fromkeys(entry[6] for entry in self._entries))
+
+    def compile(self):
+        """Строит структуру разбора; вызывается автоматически при первом разборе после регистрации."""
+        by_token, by_prefix, by_pattern = {}, {}, []
+        for entry in sorted(self._entries, key=lambda e: (-e[0], e[1])):
+            _, _, token, prefix, regex, handler, key = entry
+            item = (entry[0], entry[1], regex, handler, key)
+            if token is not None:
+                by_token.setdefault(token, []).append(item)
+            elif prefix is not None:
+                by_prefix.setdefault(prefix, []).append(item)
+            else:
+                by_pattern.append(item)
+        # Одно выражение-фильтр для всех декодеров без токена и префикса;
+        # если выражения несовместимы (одинаковые имена групп), фильтр не строится
+        screen = None
+        if by_pattern:
+            try:
+                screen = re.compile('|'.join(f'(?:{p[2].pattern})' for p in by_pattern))
+            except re.error:
+                pass
+        lengths = sorted({len(p) for p in by_prefix}, reverse=True)
+        self._compiled = (by_token, by_prefix, lengths, by_pattern, screen)
+
+    def decode(self, tok: str):
+        """Возвращает (текст, ключ, словарь) или None."""
+        if self._compiled is None:
+            self.compile()
+        by_token, by_prefix, lengths, by_pattern, screen = self._compiled
+        candidates = list(by_token.get(tok, ()))
+        for n in lengths:
+            candidates.extend(by_prefix.get(tok[:n], ()))
+        if by_pattern and (screen is None or screen.fullmatch(tok)):
+            candidates.extend(by_pattern)
+        if len(candidates) > 1:
+            candidates.sort(key=lambda c: (-c[0], c[1]))
+        for _, _, regex, handler, key in candidates:
+            m = None
+            if regex is not None:
+                m = regex.fullmatch(tok)
+                if m is None:
+                    continue
+            res = handler(tok, m)
+            if res is not None:
+                return res[0], key, res[1]
+        return None
+
+TOKEN_DECODERS = TokenDecoderRegistry()
+
+def register_token_decoder(handler, **kwargs):
+    """Регистрирует декодер группы в общем реестре (см. TokenDecoderRegistry.register)."""
+    TOKEN_DECODERS.register(handler, **kwargs)
+
 # ==============================
 # Основной декодер METAR
 # ==============================
-def decode_metar(metar: str) -> tuple[str, dict]:
-    tokens = metar.replace("=", "").split()
+def decode_metar(metar: str, normalize: bool = False, profile: str | None = None,
+                 stations=None, state=None, derived: bool = False) -> tuple[str, dict]:
+    """
+    Декодирует сводку в (текст, словарь).
+    normalize=True добавляет в основной блок и в блоки трендов ключ 'normalized'
+    со значениями в единых единицах (см. normalize_block).
+    derived=True добавляет производные поля: отпечаток 'digest' (report_digest),
+    коды явлений в записях 'weather', маски 'hazards*' (block_hazards), 'cloud_summary'
+    (cloud_model) и окна трендов 'validity' (trend_validity). Без него потребители
+    вычисляют их сами, когда они нужны.
+    profile — имя из REGIONAL_PROFILES; по умолчанию выбирается по индексу станции.
+    stations — справочник станций (metar_stations.StationRegistry) для обогащения словаря.
+    state — хранилище состояний станций (metar_state.StationStateStore): по нему
+            разрешаются группы R99, после разбора в него записывается сводка.
+    """
+    tokens = tokenize_metar(metar)
     out = []
     # НОВОЕ: Инициализация словаря и указателя на текущий блок данных
     metar_data = {}
+    # Тип сводки и отпечаток текста: по ним потребители отличают разные сводки одного срока
+    if tokens and tokens[0] in ('METAR', 'SPECI'):
+        metar_data['report_type'] = tokens[0]
+    if derived:
+        metar_data['digest'] = report_digest(tokens).hex()
     current_data_block = metar_data
+    active_profile = REGIONAL_PROFILES[profile or DEFAULT_PROFILE]
+    runway_groups = 'runway_state' in active_profile['body']
+    re_rvr, rvr_unit = active_profile['rvr']
     i = 0
     while i < len(tokens):
         t = tokens[i]
+        # Первый символ отсекает заведомо чужие группы до вызова сканера: проверки ниже —
+        # необходимые условия соответствующего разбора и в режиме сканеров, и в режиме regex
+        lead = t[0]
         
         # Станция
-        if RE_STATION.match(t) and (i == 1 or (i > 0 and tokens[i-1] in ["METAR", "SPECI"])):
+        # (в начале сводки — формат raw_text ADDS: "KJFK 261351Z ...")
+        if RE_STATION.match(t) and (i <= 1 or tokens[i-1] in ["METAR", "SPECI", "COR", "AMD"]):
             out.append(f"Аэродром: {t}")
             # ИЗМЕНЕНО: Запись через указатель
             current_data_block['station'] = {'code': t}
+            if profile is None:
+                active_profile = select_profile(t)
+                runway_groups = 'runway_state' in active_profile['body']
+                re_rvr, rvr_unit = active_profile['rvr']
+            metar_data['profile'] = active_profile['name']
+
+        # Исправленная / уточнённая сводка
+        elif t in CORRECTION_MARKS:
+            out.append(CORRECTION_MARKS[t])
+            metar_data['correction'] = t
+
+        # Фиксированные группы профиля (AUTO, NIL, $ ...)
+        elif t in active_profile['fixed_tokens']:
+            text, key = active_profile['fixed_tokens'][t]
+            out.append(text)
+            metar_data[key] = True
 
         # Время
-        elif RE_TIME.match(t):
+        elif t[-1] == 'Z' and (tm := SCAN.time(t)) is not None:
             out.append(f"Время наблюдения: {t} UTC")
             # ИЗМЕНЕНО: Запись через указатель
             current_data_block['time'] = {
                 'raw': t,
-                'day': int(t[0:2]),
-                'hour': int(t[2:4]),
-                'minute': int(t[4:6])
+                'day': tm[0],
+                'hour': tm[1],
+                'minute': tm[2]
             }
 
         # Ветер
-        elif RE_WIND.match(t):
-            m = RE_WIND.match(t)
-            d, s, g, u = m.group('dir'), int(m.group('spd')), m.group('gust'), (m.group('unit') or 'KT').upper()
+        elif (lead == 'V' or lead.isdecimal()) and (wg := SCAN.wind(t)) is not None:
+            d, s, g, u = wg
+            u = u or 'KT'
             unit_ru = 'м/с' if u == 'MPS' else 'км/ч' if u == 'KMH' else 'уз.'
             if d == '000': wind = f"Штиль, {s} {unit_ru}"
             elif d == 'VRB': wind = f"Ветер переменный {s} {unit_ru}"
             else: wind = f"Ветер {int(d)}° {s} {unit_ru}"
-            if g: wind += f", порывы {int(g)} {unit_ru}"
+            if g is not None: wind += f", порывы {g} {unit_ru}"
             out.append(wind)
             # ИЗМЕНЕНО: Запись через указатель
             current_data_block['wind'] = {
                 'raw': t,
                 'direction': d if d == 'VRB' else int(d),
                 'speed': s,
-                'gust': int(g) if g else None,
+                'gust': g,
                 'unit': u
             }
 
         # Вариабельность ветра
-        elif RE_VARWIND.match(t):
-            m = RE_VARWIND.match(t)
+        elif lead.isdecimal() and (m := RE_VARWIND.match(t)):
             out.append(f"Вариабельность ветра: {m.group('from')}°–{m.group('to')}°")
             # ИЗМЕНЕНО: Запись через указатель и setdefault
             current_data_block.setdefault('wind', {})['variability'] = {
@@ -394,31 +1380,33 @@ def decode_metar(metar: str) -> tuple[str, dict]:
             }
 
         # Видимость
-        elif RE_VIS.match(t):
-            m = RE_VIS.match(t)
-            vis, dir_ = int(m.group('vis')), m.group('dir') or ''
-            if vis == 9999:
-                out.append("Видимость ≥10 км")
+        elif ((lead.isdecimal() and (len(t) == 1 or SCAN.vis(t) is not None)) or t.endswith('SM')) \
+                and (parsed := parse_visibility(tokens, i)):
+            vis_data, vis_text, used = parsed
+            out.append(vis_text)
+            existing = current_data_block.get('visibility')
+            if existing is None:
+                current_data_block['visibility'] = vis_data
             else:
-                if out and out[-1].startswith("Видимость"):
-                    if dir_: out[-1] += f", в направлении {dir_} — {vis} м"
-                    else: out[-1] = f"Видимость минимальная {vis} м"
-                else:
-                    if dir_: out.append(f"Видимость {vis} м {dir_}")
-                    else: out.append(f"Видимость минимальная {vis} м")
-            # ИЗМЕНЕНО: Запись через указатель и setdefault
-            vis_data = {'raw': t, 'meters': vis}
-            if dir_: vis_data['direction'] = dir_
-            current_data_block.setdefault('visibility', []).append(vis_data)
-
+                # Отдельная группа видимости в том же блоке дополняет первую, а не заменяет её
+                extra = {'raw': vis_data['raw'], 'meters': vis_data['meters'],
+                         'direction': vis_data.get('direction')}
+                groups = existing.setdefault('directional', [existing['minimum']] if existing['minimum'] else [])
+                groups.append(extra)
+                existing['raw'] += ' ' + vis_data['raw']
+                if existing['minimum'] is None or extra['meters'] < existing['minimum']['meters']:
+                    existing['minimum'] = extra
+            i += used
+            continue
 
         # RVR
-        elif RE_RVR.match(t):
-            m = RE_RVR.match(t)
+        elif lead == 'R' and (m := re_rvr.match(t)):
             val = m.group('val')
-            if val.startswith('P'): val_txt = f">{val[1:]} м"
-            elif val.startswith('M'): val_txt = f"<{val[1:]} м"
-            else: val_txt = f"{int(val)} м"
+            unit_txt = 'м' if rvr_unit == 'M' else 'ft'
+            if val.startswith('P'): val_txt = f">{val[1:]} {unit_txt}"
+            elif val.startswith('M'): val_txt = f"<{val[1:]} {unit_txt}"
+            else: val_txt = f"{int(val)} {unit_txt}"
+            if m.group('max'): val_txt += f"–{m.group('max').lstrip('PM')} {unit_txt}"
             trend_map = {'U': 'улучшалась', 'D': 'ухудшалась', 'N': 'без изменений'}
             trend = trend_map.get(m.group('trend'), '')
             out.append(f"RVR ВПП {m.group('rwy')}: {val_txt} {trend}".strip())
@@ -428,17 +1416,17 @@ def decode_metar(metar: str) -> tuple[str, dict]:
                 'runway': m.group('rwy'),
                 'value_raw': m.group('val'),
                 'value_max': m.group('max'),
+                'unit': rvr_unit,
                 'trend': m.group('trend')
             }
             current_data_block.setdefault('rvr', []).append(rvr_data)
 
         # Облачность
-        elif RE_CLOUD.match(t):
+        elif lead in CLOUD_LEAD and (cg := SCAN.cloud(t)) is not None:
             decoded_cloud_text = decode_cloud(t)
             out.append("Облачность: " + decoded_cloud_text)
             # ИЗМЕНЕНО: Запись через указатель и setdefault
-            m = RE_CLOUD.match(t)
-            grp, hhh, extra = m.groups()
+            grp, hhh, extra = cg
             cloud_data = {
                 'raw': t,
                 'code': grp,
@@ -449,8 +1437,8 @@ def decode_metar(metar: str) -> tuple[str, dict]:
             current_data_block.setdefault('clouds', []).append(cloud_data)
 
         # Вертикальная видимость
-        elif RE_VV.match(t):
-            vv = RE_VV.match(t).group(1)
+        elif lead == 'V' and (m := RE_VV.match(t)):
+            vv = m.group(1)
             out.append("Вертикальная видимость: нет данных" if vv == "///" else f"Вертикальная видимость {int(vv)*30} м")
             # ИЗМЕНЕНО: Запись через указатель
             current_data_block['vertical_visibility'] = {
@@ -459,8 +1447,8 @@ def decode_metar(metar: str) -> tuple[str, dict]:
             }
 
         # Температура и точка росы
-        elif RE_TEMP.match(t):
-            T, Td = t.split('/')
+        elif '/' in t and (tg := SCAN.temp(t)) is not None:
+            T, Td = tg
             T_val = "нет данных" if T == "//" else f"{T.replace('M','-')}°C"
             Td_val = "нет данных" if Td == "//" else f"{Td.replace('M','-')}°C"
             out.append(f"Температура {T_val}, точка росы {Td_val}")
@@ -472,50 +1460,74 @@ def decode_metar(metar: str) -> tuple[str, dict]:
             }
 
         # Давление
-        elif RE_Q.match(t):
-            pressure_hpa = int(RE_Q.match(t).group(1))
+        elif lead == 'Q' and (pressure_hpa := SCAN.qnh(t)) is not None:
             out.append(f"Давление QNH {pressure_hpa} гПа")
             # ИЗМЕНЕНО: Запись через указатель
             current_data_block['pressure'] = {'raw': t, 'qnh_hpa': pressure_hpa}
-        elif RE_A.match(t):
-            pressure_inhg = int(RE_A.match(t).group(1)) / 100.0
+        elif lead == 'A' and (altimeter := SCAN.altimeter(t)) is not None:
+            pressure_inhg = altimeter / 100.0
             out.append(f"Давление {pressure_inhg:.2f} inHg")
             # ИЗМЕНЕНО: Запись через указатель
             current_data_block['pressure'] = {'raw': t, 'altimeter_inhg': pressure_inhg}
 
         # Тренд
         elif RE_TREND.match(t):
+            qualifier = TREND_TIME_QUALIFIERS.get(t[:2])
+            # FM/TL/AT после BECMG/TEMPO — уточнение времени, а не новый блок
+            if qualifier and current_data_block.get('code') in TREND_CHANGE_CODES:
+                key, prep = qualifier
+                q = parse_trend_time(t)
+                current_data_block[key] = q
+                if 'hour' in q:
+                    out.append(f"  {prep} {q['hour']:02d}:{q['minute']:02d} UTC")
+                else:
+                    out.append(f"  {t}")
+                i += 1
+                continue
             out.append(f"Тренд {t}")
             # НОВОЕ: Логика для переключения контекста записи в JSON
             # Создаем список трендов в основном объекте, если его нет
             metar_data.setdefault('trend', [])
             # Создаем новый словарь для этого конкретного блока тренда
             trend_block_dict = {'code': t}
+            if qualifier:
+                trend_block_dict[qualifier[0]] = parse_trend_time(t)
             # Добавляем его в общий список трендов
             metar_data['trend'].append(trend_block_dict)
             # ПЕРЕКЛЮЧАЕМ УКАЗАТЕЛЬ на этот новый словарь!
             current_data_block = trend_block_dict
 
         # Состояние ВПП
-        elif t.startswith("R") and (RE_RUNWAY6.match(t) or RE_RUNWAY_VAR.match(t) or any(x in t for x in ["CLRD","CLSD","SNOCLO","RRRR"])):
-            r = decode_runway(t)
+        elif runway_groups and t.startswith("R") and (RE_RUNWAY6.match(t) or RE_RUNWAY_VAR.match(t) or any(x in t for x in ["CLRD","CLSD","SNOCLO","RRRR"])):
+            runway_data = decode_runway(t)
+            r = render_runway_state(runway_data) if runway_data else None
             out.append(r if r else f"(неизвестно) {t}")
-            # ИЗМЕНЕНО: Запись через указатель и setdefault
-            runway_data = {'raw': t, 'decoded_text': r}
+            # Структурированная запись; текст хранится рядом для совместимости
+            if runway_data is None:
+                runway_data = {'raw': t}
+            runway_data['decoded_text'] = r
+            # R99: подставляем состояние ВПП из предыдущей сводки станции
+            if state is not None and runway_data.get('repeat') and 'station' in metar_data:
+                previous = state.previous_runways(metar_data['station']['code'])
+                runway_data['repeat_of'] = list(previous)
+                for prev in previous:
+                    out.append("  " + prev['decoded_text'].replace("\n", "\n  "))
             current_data_block.setdefault('runway_state', []).append(runway_data)
 
         # Погодные явления
         elif RE_WEATHER.match(t):
-            phrase = decode_weather_token(t)
+            codes = parse_weather_token(t)
+            phrase = render_weather(codes)
             if phrase:
                 out.append("Явления: " + phrase)
-                # ИЗМЕНЕНО: Запись через указатель и setdefault
                 weather_data = {'raw': t, 'decoded_text': phrase}
+                if derived:
+                    weather_data.update(codes)
                 current_data_block.setdefault('weather', []).append(weather_data)
 
         # NSW
         elif t == "NSW":
-            out.append("В прогнозе: без значимых явлений" if out and out[-1].startswith("Тренд") else "Явления: без значимых явлений")
+            out.append("В прогнозе: без значимых явлений" if current_data_block is not metar_data else "Явления: без значимых явлений")
             # ИЗМЕНЕНО: Запись через указатель и setdefault
             nsw_data = {'raw': t, 'decoded_text': 'Без значимых явлений'}
             current_data_block.setdefault('weather', []).append(nsw_data)
@@ -545,63 +1557,26 @@ def decode_metar(metar: str) -> tuple[str, dict]:
             # ИЗМЕНЕНО: Запись через указатель и setdefault
             current_data_block.setdefault('wind_shear', []).append(ws_dict)
 
-        # RMK (С НОВЫМ ИСПРАВЛЕННЫМ БЛОКОМ)
+        # RMK
         elif t == 'RMK':
             remark_tokens = tokens[i+1:]
-            # Добавляем один общий заголовок для всех ремарок
+            # Один общий заголовок для всех ремарок; разбор — через таблицу профиля
             if remark_tokens:
                 out.append("Ремарки:")
-                # НОВОЕ: Ремарки всегда пишутся в основной блок, а не в тренд
-                metar_data['remarks'] = {'raw': ' '.join(remark_tokens), 'decoded': []}
-
-            j = 0
-            while j < len(remark_tokens):
-                rt = remark_tokens[j]
-                decoded_remark_text = None
-                decoded_remark_dict = {}
-                
-                # --- НОВАЯ ЛОГИКА: Проверяем фразы из двух слов ---
-                # Проверяем, что мы не выходим за границы списка
-                if j + 1 < len(remark_tokens):
-                    phrase = f"{rt} {remark_tokens[j+1]}"
-                    if phrase == "MT OBSC":
-                        decoded_remark_text = "  - Горы закрыты облачностью/осадками"
-                        decoded_remark_dict = {'code': phrase, 'description': 'Горы закрыты облачностью/осадками'}
-                        out.append(decoded_remark_text)
-                        metar_data['remarks']['decoded'].append(decoded_remark_dict)
-                        j += 2
-                        continue
-                    if phrase == "OBST OBSC":
-                        decoded_remark_text = "  - Препятствия закрыты облачностью/осадками"
-                        decoded_remark_dict = {'code': phrase, 'description': 'Препятствия закрыты облачностью/осадками'}
-                        out.append(decoded_remark_text)
-                        metar_data['remarks']['decoded'].append(decoded_remark_dict)
-                        j += 2
-                        continue
-                
-                # --- СТАРАЯ ЛОГИКА для одиночных токенов ---
-                if rt.startswith("QFE"):
-                    val = rt[3:]
-                    decoded_remark_text = f"  - Давление QFE {val.replace('/', ' мм рт.ст. (доп. ')} мм рт.ст."
-                    decoded_remark_dict = {'code': rt, 'description': 'Давление QFE', 'value': val}
-                    out.append(decoded_remark_text)
-                elif rt.startswith("QBB"):
-                    decoded_remark_text = f"  - Нижняя граница облаков {rt[3:]} м"
-                    decoded_remark_dict = {'code': rt, 'description': 'Нижняя граница облаков', 'value_m': rt[3:]}
-                    out.append(decoded_remark_text)
-                else: # Обработка остальных, теперь как неизвестных
-                    decoded_remark_text = f"  - (неизвестная ремарка) {rt}"
-                    decoded_remark_dict = {'code': rt, 'description': 'Неизвестная ремарка'}
-                    out.append(decoded_remark_text)
-                
-                # НОВОЕ: Добавление в словарь
-                if decoded_remark_dict:
-                     metar_data['remarks']['decoded'].append(decoded_remark_dict)
-
-                j += 1
+                lines, decoded = active_profile['remarks'].decode(remark_tokens)
+                out.extend(lines)
+                # Ремарки всегда пишутся в основной блок, а не в тренд
+                metar_data['remarks'] = {'raw': ' '.join(remark_tokens), 'decoded': decoded}
 
             break
             
+        # Подключаемые декодеры (до признания группы неизвестной)
+        elif TOKEN_DECODERS and (plugged := TOKEN_DECODERS.decode(t)) is not None:
+            text, key, data = plugged
+            out.append(text)
+            # Текст декодера хранится в записи: по нему отрисовывают потребители (metar_i18n)
+            current_data_block.setdefault(key, []).append({**data, 'decoded_text': text})
+
         # иначе — неизвестный токен
         else:
             if t not in ["METAR", "SPECI", "TAF"]:
@@ -611,6 +1586,28 @@ def decode_metar(metar: str) -> tuple[str, dict]:
 
         i += 1
 
+    if derived:
+        resolve_trend_validity(metar_data)
+        # Маски опасных явлений (в основном блоке всегда, в трендах — при наличии явлений)
+        # и модель облачности (при наличии групп облачности или VV)
+        for block in [metar_data] + metar_data.get('trend', []):
+            if block is metar_data or 'weather' in block:
+                block['hazards'], block['hazards_vicinity'], block['hazards_recent'] = block_hazards(block)
+            model = cloud_model(block)
+            if model is not None:
+                block['cloud_summary'] = model
+
+    if stations is not None:
+        stations.enrich(metar_data)
+
+    if state is not None:
+        state.update(metar_data)
+
+    if normalize:
+        metar_data['normalized'] = normalize_block(metar_data)
+        for trend_block in metar_data.get('trend', []):
+            trend_block['normalized'] = normalize_block(trend_block)
+
     return "\n".join(out), metar_data
 
 # ==============================
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Необязательная скомпилированная сборка декодера.
+main7.py без изменений компилируется Cython в модуль расширения _main7_accel;
+типы сканеров групп задаёт дополняющий файл main7.pxd. При импорте этого модуля
+используется сборка, если она есть и собрана из текущего main7.py и main7.pxd
+(сверка по хешу исходников), иначе — чистый Python из main7.
+
+Реестры расширения у сборки общие с main7: декодеры, подключённые через
+main7.register_token_decoder, региональные профили (REGIONAL_PROFILES,
+PROFILE_BY_PREFIX) и выбор сканеров main7.set_scanners() действуют и на сборку.
+
+    python metar_accel.py build    # сборка (нужны Cython и компилятор C)
+    python metar_accel.py bench    # сравнение на стандартном корпусе
+
+    from metar_accel import decode_metar, ACCELERATED, ACCEL_STATUS
+
+Сборка и промежуточные файлы (build/, _main7_accel.c, *.so) в репозиторий не входят.
+"""
+
+import hashlib
+import importlib.machinery
+import importlib.util
+import os
+import shutil
+
+import main7
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ACCEL_MODULE = '_main7_accel'
+PXD_PATH = os.path.join(os.path.dirname(os.path.abspath(main7.__file__)), 'main7.pxd')
+# Глобальные имена main7, которые в сборке заменяются объектами main7
+SHARED_REGISTRIES = ('TOKEN_DECODERS', 'REGIONAL_PROFILES', 'PROFILE_BY_PREFIX')
+
+
+def source_hash() -> str:
+    digest = hashlib.sha256()
+    for path in (main7.__file__, PXD_PATH):
+        with open(path, 'rb') as fh:
+            digest.update(fh.read())
+    return digest.hexdigest()
+
+
+def _extension_path() -> str | None:
+    """Собранный модуль рядом с этим файлом (не зависит от sys.path и текущего каталога)."""
+    for suffix in importlib.machinery.EXTENSION_SUFFIXES:
+        path = os.path.join(HERE, ACCEL_MODULE + suffix)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _load():
+    """Возвращает (модуль, собран ли, причина выбора) — причина видна в ACCEL_STATUS."""
+    path = _extension_path()
+    if path is None:
+        return main7, False, "сборка не найдена: python metar_accel.py build"
+    try:
+        spec = importlib.util.spec_from_file_location(ACCEL_MODULE, path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+    except ImportError as exc:
+        return main7, False, f"сборка {path} не загружается: {exc}"
+    # Сборка из устаревшего исходника не используется
+    if getattr(mod, '_SOURCE_SHA256', None) != source_hash():
+        return main7, False, f"сборка {path} устарела (main7.py или main7.pxd изменён)"
+    for name in SHARED_REGISTRIES:
+        setattr(mod, name, getattr(main7, name))
+    return mod, True, f"используется сборка {path}"
+
+
+impl, ACCELERATED, ACCEL_STATUS = _load()
+DECODER_VERSION = impl.DECODER_VERSION
+
+if ACCELERATED:
+    def decode_metar(metar: str, *args, **kwargs) -> tuple[str, dict]:
+        """decode_metar сборки в режиме сканеров, выбранном main7.set_scanners()."""
+        if impl.SCAN.enabled != main7.SCAN.enabled:
+            impl.SCAN.select(main7.SCAN.enabled)
+        return impl.decode_metar(metar, *args, **kwargs)
+else:
+    decode_metar = main7.decode_metar
+
+
+def build(build_dir: str | None = None) -> str:
+    """
+    Копирует main7.py в _main7_accel.py (с хешем исходников) и main7.pxd в
+    _main7_accel.pxd и компилирует их Cython на месте. Возвращает путь к собранному модулю.
+    """
+    from Cython.Build import cythonize
+    from setuptools import Extension
+    from setuptools.dist import Distribution
+
+    with open(main7.__file__, encoding='utf-8') as fh:
+        source = fh.read()
+    accel_py = os.path.join(HERE, ACCEL_MODULE + '.py')
+    with open(accel_py, 'w', encoding='utf-8') as fh:
+        fh.write(source)
+        fh.write(f"\n_SOURCE_SHA256 = {source_hash()!r}\n")
+    accel_pxd = os.path.join(HERE, ACCEL_MODULE + '.pxd')
+    shutil.copyfile(PXD_PATH, accel_pxd)
+
+    ext = Extension(ACCEL_MODULE, [accel_py])
+    dist = Distribution({'ext_modules': cythonize([ext], language_level=3, quiet=True)})
+    cmd = dist.get_command_obj('build_ext')
+    cmd.inplace = True
+    cmd.build_temp = build_dir or os.path.join(HERE, 'build')
+    cmd.ensure_finalized()
+    cmd.run()
+    # Исходники копии больше не нужны: иначе при отсутствии расширения импортировался бы .py
+    os.remove(accel_py)
+    os.remove(accel_pxd)
+    return cmd.get_ext_fullpath(ACCEL_MODULE)
+
+
+# ==============================
+# Бенчмарк: сборка против чистого Python
+# ==============================
+STANDARD_CORPUS = [
+    "METAR ULMM 261330Z 22005G12MPS 180V250 9999 -SHRASN BKN028CB 03/M02 Q1000 R13/290051 NOSIG RMK QFE744=",
+    "METAR ULLI 101330Z 23002MPS 5000 -SHSN SCT006 BKN020CB OVC036 M01/M01 Q1009 RESHSN R28L/550539 R28R/590537 TEMPO 0800 +SHSN FZRA BKN004 BKN016CB RMK OBST OBSC=",
+    "METAR ULLI 191700Z 29008MPS 2200 0900SE R28L/1900U R28R/2000U +SHSN BLSN SCT011 BKN019CB OVC033 M06/M07 Q0996 R28L/452030 R28R/490535 BECMG 6000 NSW=",
+    "METAR ULLI 200930Z 32005MPS 9999 VCTS -SHRA BKN029CB 17/14 Q1000 R88/290050 TEMPO VRB13MPS 1000 SHRA SQ BKN016CB=",
+    "METAR UUUU 201000Z 24015G25KT 2000 +TSRASNGR BKN015CB 01/00 Q0998",
+    "METAR URMM 021630Z 11005MPS 4400 -SHRA BR BKN004 OVC021CB 12/11 Q1023 R11/190060 TEMPO 0300 -SHRA FG BKN002 BKN030CB RMK MT OBSC OBST OBSC QFE739/0986",
+    "METAR KJFK 261351Z 31015G25KT 1 1/2SM -RA BR FEW008 OVC015 12/10 A2992 RMK AO2 SLP132 T01220100",
+]
+
+
+def benchmark(n: int = 20_000):
+    import timeit
+
+    corpus = [STANDARD_CORPUS[k % len(STANDARD_CORPUS)] for k in range(n)]
+    engines = {'main7 (Python)': main7.decode_metar}
+    if ACCELERATED:
+        # Сборка должна давать тот же результат
+        assert [impl.decode_metar(s) for s in STANDARD_CORPUS] == [main7.decode_metar(s) for s in STANDARD_CORPUS]
+        engines[f'{ACCEL_MODULE} (Cython)'] = impl.decode_metar
+    rates = {}
+    for name, fn in engines.items():
+        dt = min(timeit.repeat(lambda: [fn(s) for s in corpus], number=1, repeat=3))
+        rates[name] = n / dt
+        print(f"{name:<24} {rates[name]:>10,.0f} сводок/с")
+    if len(rates) > 1:
+        base, fast = rates.values()
+        print(f"ускорение: {fast / base:.2f}x")
+    else:
+        print(ACCEL_STATUS)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ['build']:
+        print("собрано:", build())
+    else:
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 20_000)
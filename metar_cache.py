@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Постоянный кэш результатов decode_metar на диске (SQLite).
+Ключ — хэш нормализованной сводки, значение — сериализованная пара (текст, словарь).
+Записи другой версии декодера считаются отсутствующими. Поддерживаются ограничение
+размера (вытеснение давно не использованных записей) и срок жизни записей.
+Файл можно открывать одновременно из нескольких процессов: WAL и ожидание блокировки.
+"""
+
+import json
+import sqlite3
+import time
+
+from main7 import decode_metar, tokenize_metar, report_digest, DECODER_VERSION, TOKEN_DECODERS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decode_cache (
+    key      TEXT PRIMARY KEY,
+    version  TEXT NOT NULL,
+    text     TEXT NOT NULL,
+    data     TEXT NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS decode_cache_accessed ON decode_cache (accessed);
+"""
+
+# Время последнего обращения обновляется не чаще, чем раз в столько секунд,
+# чтобы попадания в кэш не превращались в постоянную запись на диск.
+ACCESS_GRANULARITY = 60.0
+
+
+def report_hash(metar: str, normalize: bool = False, profile: str | None = None,
+                derived: bool = False) -> str:
+    """
+    Хэш нормализованной сводки (та же нормализация, что и в decode_metar) вместе
+    с параметрами, от которых зависит вывод: normalize, derived, явный профиль и набор
+    подключаемых декодеров (main7.TOKEN_DECODERS).
+    """
+    salt = ('N' if normalize else '') + ('D' if derived else '')
+    signature = TOKEN_DECODERS.signature()
+    if profile or signature:
+        salt += f"|{profile or ''}|{signature}"
+    return report_digest(tokenize_metar(metar), salt).hex()
+
+
+class DecodeCache:
+    """
+    path          — файл базы SQLite (создаётся при необходимости);
+    max_entries   — верхняя граница числа записей (None — без ограничения);
+    ttl_seconds   — срок жизни записи (None — бессрочно);
+    version       — версия декодера, с которой совместимы записи.
+    """
+
+    def __init__(self, path: str, max_entries: int | None = 1_000_000,
+                 ttl_seconds: float | None = None, version: str = DECODER_VERSION,
+                 evict_every: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = version
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._conn = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM decode_cache").fetchone()[0]
+
+    def get(self, metar: str, normalize: bool = False, profile: str | None = None,
+            derived: bool = False):
+        """Возвращает (текст, словарь) или None."""
+        key = report_hash(metar, normalize, profile, derived)
+        row = self._conn.execute(
+            "SELECT version, text, data, created, accessed FROM decode_cache WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or row[0] != self.version or \
+                (self.ttl_seconds is not None and now - row[3] > self.ttl_seconds):
+            self.misses += 1
+            return None
+        if now - row[4] > ACCESS_GRANULARITY:
+            self._conn.execute("UPDATE decode_cache SET accessed = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[1], json.loads(row[2])
+
+    def put(self, metar: str, text: str, data: dict, normalize: bool = False, profile: str | None = None,
+            derived: bool = False):
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO decode_cache (key, version, text, data, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (report_hash(metar, normalize, profile, derived), self.version, text,
+             json.dumps(data, ensure_ascii=False, separators=(',', ':')), now, now))
+        self._puts += 1
+        if self._puts % self.evict_every == 0:
+            self.evict()
+
+    def decode(self, metar: str, normalize: bool = False, profile: str | None = None,
+               derived: bool = False) -> tuple[str, dict]:
+        """decode_metar с чтением/записью кэша."""
+        cached = self.get(metar, normalize, profile, derived)
+        if cached is not None:
+            return cached
+        text, data = decode_metar(metar, normalize=normalize, profile=profile, derived=derived)
+        self.put(metar, text, data, normalize, profile, derived)
+        return text, data
+
+    def evict(self):
+        """Удаляет записи чужой версии, просроченные и лишние сверх max_entries (LRU)."""
+        with self._conn:
+            self._conn.execute("DELETE FROM decode_cache WHERE version != ?", (self.version,))
+            if self.ttl_seconds is not None:
+                self._conn.execute("DELETE FROM decode_cache WHERE created < ?",
+                                   (time.time() - self.ttl_seconds,))
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM decode_cache WHERE key IN ("
+                    " SELECT key FROM decode_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,))
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+
+    samples = [
+        "METAR ULMM 261330Z 22005G12MPS 180V250 9999 -SHRASN BKN028CB 03/M02 Q1000 R13/290051 NOSIG RMK QFE744=",
+        "METAR ULLI 101330Z 23002MPS 5000 -SHSN SCT006 BKN020CB OVC036 M01/M01 Q1009 RESHSN R28L/550539 R28R/590537 TEMPO 0800 +SHSN FZRA BKN004 BKN016CB RMK OBST OBSC=",
+        "METAR UUUU 201000Z 24015G25KT 2000 +TSRASNGR BKN015CB 01/00 Q0998",
+    ]
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.gettempdir(), 'metar_cache.sqlite')
+    with DecodeCache(path, max_entries=10_000) as cache:
+        for _ in range(3):
+            for s in samples:
+                cache.decode(s)
+        print(f"{path}: entries={len(cache)} hits={cache.hits} misses={cache.misses}")
+
+        # Профиль и подключаемые декодеры входят в ключ: результаты без них не подставляются
+        from metar_plugins import register_all
+        plain = report_hash(samples[0])
+        assert report_hash(samples[0], profile='FAA') != plain
+        register_all()
+        assert report_hash(samples[0]) != plain
+        print("ключи с профилем и декодерами отличаются")
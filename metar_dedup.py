@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Дедупликация потока METAR/SPECI.
+Повторные копии одной и той же сводки отбрасываются без декодирования,
+исправленные сводки (COR/AMD) замещают исходные.
+"""
+
+from collections import OrderedDict
+
+from main7 import decode_metar, tokenize_metar, report_digest, CORRECTION_MARKS, RE_STATION, RE_TIME
+
+# Минут в "месяце" для сравнения времени наблюдения через границу месяца
+MINUTES_WRAP = 31 * 24 * 60
+
+# Модификаторы сводки, которые могут стоять сразу после группы времени
+REPORT_MODIFIERS = frozenset(('COR', 'AMD', 'AUTO'))
+
+# Статусы, которые возвращает MetarDeduplicator.process()
+STATUS_NEW = 'new'                 # новая сводка, декодирована
+STATUS_CORRECTION = 'correction'   # COR/AMD, декодирована и замещает исходную
+STATUS_DUPLICATE = 'duplicate'     # точная копия, декодирование пропущено
+STATUS_SUPERSEDED = 'superseded'   # исходная сводка после уже принятой COR/AMD, пропущена
+
+
+def report_key(tokens: list[str]) -> tuple:
+    """
+    Быстро извлекает (станция, время, признак исправления) из заголовка сводки,
+    не запуская полный декодер. Станция — последняя 4-буквенная группа перед временем.
+    После времени просматриваются модификаторы сводки: в практике США COR стоит
+    за временем ("METAR KJFK 261351Z COR ...").
+    """
+    station, time, corrected = None, None, False
+    for k, t in enumerate(tokens):
+        if t in CORRECTION_MARKS:
+            corrected = True
+        elif RE_TIME.match(t):
+            time = t
+            for m in tokens[k + 1:k + 1 + len(REPORT_MODIFIERS)]:
+                if m not in REPORT_MODIFIERS:
+                    break
+                corrected = corrected or m in CORRECTION_MARKS
+            break
+        elif RE_STATION.match(t):
+            station = t
+    return station, time, corrected
+
+
+def _minute_of_month(time_raw: str) -> int:
+    return int(time_raw[0:2]) * 1440 + int(time_raw[2:4]) * 60 + int(time_raw[4:6])
+
+
+class MetarDeduplicator:
+    """
+    Ограниченное по размеру и по окну времени множество ключей
+    (станция, время) -> {хэши нормализованного текста, признак исправления}.
+    """
+
+    def __init__(self, window_minutes: int = 180, max_entries: int = 100_000):
+        self.window_minutes = window_minutes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._newest = None
+        self.stats = {STATUS_NEW: 0, STATUS_CORRECTION: 0, STATUS_DUPLICATE: 0, STATUS_SUPERSEDED: 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if self._newest is None:
+            return
+        # Ключи добавляются примерно в порядке времени наблюдения, поэтому
+        # устаревшие записи всегда находятся в начале словаря.
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if (self._newest - entry['minute']) % MINUTES_WRAP <= self.window_minutes:
+                break
+            self._entries.popitem(last=False)
+
+    def process(self, metar: str) -> tuple[str, tuple | None]:
+        """
+        Возвращает (статус, результат decode_metar или None).
+        Для дубликатов и устаревших исходных сводок декодер не вызывается.
+        """
+        tokens = tokenize_metar(metar)
+        station, time, corrected = report_key(tokens)
+
+        # Без станции или времени ключ не построить — декодируем как есть
+        if station is None or time is None:
+            self.stats[STATUS_NEW] += 1
+            return STATUS_NEW, decode_metar(metar)
+
+        text_hash = report_digest([t for t in tokens if t not in CORRECTION_MARKS])
+        key = (station, time)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if entry['corrected'] and not corrected:
+                self.stats[STATUS_SUPERSEDED] += 1
+                return STATUS_SUPERSEDED, None
+            if text_hash in entry['texts'] and entry['corrected'] == corrected:
+                self.stats[STATUS_DUPLICATE] += 1
+                return STATUS_DUPLICATE, None
+        else:
+            minute = _minute_of_month(time)
+            entry = {'texts': set(), 'corrected': False, 'minute': minute}
+            self._entries[key] = entry
+            if self._newest is None or 0 < (minute - self._newest) % MINUTES_WRAP < MINUTES_WRAP // 2:
+                self._newest = minute
+
+        entry['texts'].add(text_hash)
+        status = STATUS_NEW
+        if corrected:
+            entry['corrected'] = True
+            status = STATUS_CORRECTION
+        self._evict()
+
+        self.stats[status] += 1
+        return status, decode_metar(metar)
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    feed = [
+        "METAR ULLI 101330Z 23002MPS 5000 -SHSN SCT006 BKN020CB M01/M01 Q1009=",
+        "METAR ULLI 101330Z 23002MPS 5000 -SHSN SCT006 BKN020CB M01/M01 Q1009",
+        "METAR  ULLI 101330Z 23002MPS 5000 -SHSN  SCT006 BKN020CB M01/M01 Q1009 =",
+        "METAR COR ULLI 101330Z 23002MPS 4000 -SHSN SCT006 BKN020CB M01/M01 Q1009=",
+        "METAR ULLI 101330Z 23002MPS 5000 -SHSN SCT006 BKN020CB M01/M01 Q1009=",
+        "METAR ULLI 101400Z 23003MPS 9999 SCT020 M01/M02 Q1010=",
+    ]
+    feed += [
+        "METAR KJFK 261351Z 31015KT 10SM FEW200 12/10 A2992",
+        "METAR KJFK 261351Z COR 31015KT 10SM FEW200 13/10 A2992",
+        "METAR KJFK 261351Z 31015KT 10SM FEW200 12/10 A2992",
+    ]
+    dedup = MetarDeduplicator()
+    for s in feed:
+        status, decoded = dedup.process(s)
+        print(f"{status:<11} {s}")
+    print(dedup.stats)
+    assert report_key(tokenize_metar("METAR KJFK 261351Z AUTO COR 31015KT"))[2]
+    assert dedup.stats == {'new': 3, 'correction': 2, 'duplicate': 2, 'superseded': 2}, dedup.stats
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Отпечатки сводок для опроса лент.
+Сводка нормализуется так же, как в decode_metar (tokenize_metar), и хэшируется
+(main7.report_digest — тот же ключ, что у кэша и дедупликации);
+для каждой станции хранится отпечаток последней сводки. Неизменившиеся сводки
+отсеиваются до декодирования, отрисовки и записи — дальше проходят только изменения.
+"""
+
+from main7 import decode_metar, tokenize_metar, report_digest
+from metar_dedup import report_key
+
+
+class ChangeDetector:
+    """Словарь станция -> отпечаток последней сводки."""
+
+    def __init__(self):
+        self.fingerprints = {}
+        self.stats = {'changed': 0, 'unchanged': 0}
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def check(self, metar: str) -> str | None:
+        """
+        Возвращает индекс станции, если сводка новая или изменилась, иначе None.
+        Сводки без распознаваемой станции всегда считаются изменившимися (возвращается '').
+        """
+        tokens = tokenize_metar(metar)
+        station = report_key(tokens)[0]
+        if station is None:
+            self.stats['changed'] += 1
+            return ''
+        fp = report_digest(tokens)
+        if self.fingerprints.get(station) == fp:
+            self.stats['unchanged'] += 1
+            return None
+        self.fingerprints[station] = fp
+        self.stats['changed'] += 1
+        return station
+
+    def changes(self, feed):
+        """Генератор (станция, сводка) только для изменившихся сводок ленты."""
+        for metar in feed:
+            station = self.check(metar)
+            if station is not None:
+                yield station, metar
+
+    def decode_changes(self, feed, **decode_kwargs) -> list[tuple[str, str, dict]]:
+        """Декодирует только изменившиеся сводки: список (сводка, текст, словарь)."""
+        return [(metar, *decode_metar(metar, **decode_kwargs)) for _, metar in self.changes(feed)]
+
+    def forget(self, station: str):
+        """Убирает станцию (следующая её сводка снова будет считаться изменением)."""
+        self.fingerprints.pop(station, None)
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    import time
+
+    poll_1 = [
+        "METAR ULLI 101330Z 23002MPS 5000 -SHSN SCT006 BKN020CB M01/M01 Q1009=",
+        "METAR UUEE 101330Z 18003MPS CAVOK 02/M04 Q1015=",
+        "METAR URMM 101330Z 11005MPS 4400 -SHRA BR BKN004 12/11 Q1023=",
+    ]
+    poll_2 = [
+        "METAR ULLI 101330Z 23002MPS 5000 -SHSN  SCT006 BKN020CB M01/M01 Q1009",
+        "METAR UUEE 101400Z 18004MPS CAVOK 02/M04 Q1015=",
+        "METAR URMM 101330Z 11005MPS 4400 -SHRA BR BKN004 12/11 Q1023=",
+    ]
+    detector = ChangeDetector()
+    for n, poll in enumerate((poll_1, poll_2), 1):
+        print(f"опрос {n}:", [station for station, _ in detector.changes(poll)])
+    print(detector.stats)
+
+    # Стоимость отпечатка против полного декодирования
+    feed = poll_1 * 10_000
+    t0 = time.perf_counter()
+    detector = ChangeDetector()
+    for _ in detector.changes(feed):
+        pass
+    t1 = time.perf_counter()
+    for s in feed:
+        decode_metar(s)
+    t2 = time.perf_counter()
+    print(f"отпечатки: {len(feed) / (t1 - t0):,.0f} сводок/с, декодирование: {len(feed) / (t2 - t1):,.0f} сводок/с")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Агрегация декодированных сводок на регулярную сетку широта/долгота.
+Для каждой ячейки хранятся: минимальная видимость, максимальные средний ветер и порыв,
+минимальная нижняя граница облаков, наличие грозы (TS) и тумана (FG) по маске опасных явлений.
+Сетка обновляется инкрементально: пересчитываются только ячейки станций,
+сводки которых изменились.
+"""
+
+import math
+from array import array
+
+from main7 import block_conditions, block_hazards, visibility_meters, HAZ_FOG, HAZ_THUNDERSTORM
+
+NAN = math.nan
+
+# Поля сетки и функция свёртки значений станций в ячейке
+GRID_FIELDS = {
+    'min_visibility_m': min,
+    'max_wind_mps': max,
+    'max_gust_mps': max,
+    'min_ceiling_ft': min,
+    'thunderstorm': max,
+    'fog': max,
+}
+
+
+def station_values(metar_data: dict) -> tuple:
+    """Значения станции в порядке GRID_FIELDS (NaN — нет данных)."""
+    cond = block_conditions(metar_data)
+    _, vis_min = visibility_meters(metar_data)
+    if vis_min is None:
+        vis_min = cond.get('visibility_m')
+    # Без порыва в сводке поле порыва пусто (NaN) и не участвует в максимуме ячейки
+    wind = cond.get('wind_speed_mps')
+    gust = cond.get('wind_gust_mps')
+    hazards = metar_data['hazards'] if 'hazards' in metar_data else block_hazards(metar_data)[0]
+    return (
+        NAN if vis_min is None else float(vis_min),
+        NAN if wind is None else float(wind),
+        NAN if gust is None else float(gust),
+        NAN if cond.get('ceiling_ft') is None else float(cond['ceiling_ft']),
+        float(bool(hazards & HAZ_THUNDERSTORM)),
+        float(bool(hazards & HAZ_FOG)),
+    )
+
+
+class GridAggregator:
+    """
+    Сетка [lat_min, lat_max) x [lon_min, lon_max) с шагом resolution_deg.
+    stations — {индекс станции: (широта, долгота)}, передаётся вызывающим кодом.
+    Поля доступны как плоские массивы self.fields[имя] (строка за строкой, с юга на север).
+    """
+
+    def __init__(self, lat_min, lat_max, lon_min, lon_max, resolution_deg, stations: dict):
+        self.lat_min, self.lon_min = lat_min, lon_min
+        self.res = resolution_deg
+        self.rows = math.ceil((lat_max - lat_min) / resolution_deg)
+        self.cols = math.ceil((lon_max - lon_min) / resolution_deg)
+        size = self.rows * self.cols
+        self.fields = {name: array('d', [NAN]) * size for name in GRID_FIELDS}
+
+        # Станция -> номер ячейки; ячейка -> станции в ней
+        self.station_cell = {}
+        self.cell_stations = {}
+        for code, (lat, lon) in stations.items():
+            cell = self.cell_of(lat, lon)
+            if cell is not None:
+                self.station_cell[code] = cell
+                self.cell_stations.setdefault(cell, set()).add(code)
+        self.values = {}
+
+    def cell_of(self, lat, lon):
+        r = math.floor((lat - self.lat_min) / self.res)
+        c = math.floor((lon - self.lon_min) / self.res)
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            return r * self.cols + c
+        return None
+
+    def update(self, reports) -> set:
+        """
+        reports — итерируемое словарей decode_metar. Пересчитывает только ячейки,
+        в которых значения станций изменились; возвращает множество таких ячеек.
+        """
+        dirty = set()
+        for data in reports:
+            code = data.get('station', {}).get('code')
+            cell = self.station_cell.get(code)
+            if cell is None:
+                continue
+            vals = station_values(data)
+            old = self.values.get(code)
+            if old is not None and all(a == b or (a != a and b != b) for a, b in zip(old, vals)):
+                continue
+            self.values[code] = vals
+            dirty.add(cell)
+        self._recompute(dirty)
+        return dirty
+
+    def remove(self, code: str):
+        """Убирает станцию (например, по истечении срока сводки) и пересчитывает её ячейку."""
+        if self.values.pop(code, None) is not None:
+            self._recompute({self.station_cell[code]})
+
+    def _recompute(self, cells):
+        for cell in cells:
+            per_station = [self.values[s] for s in self.cell_stations[cell] if s in self.values]
+            for k, (name, reduce) in enumerate(GRID_FIELDS.items()):
+                present = [v[k] for v in per_station if v[k] == v[k]]
+                self.fields[name][cell] = reduce(present) if present else NAN
+
+    def as_rows(self, name: str) -> list[list[float]]:
+        """Поле в виде списка строк (удобно для numpy.array(...) или отрисовки)."""
+        arr = self.fields[name]
+        return [arr[r * self.cols:(r + 1) * self.cols].tolist() for r in range(self.rows)]
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    from main7 import decode_metar
+
+    coords = {'ULLI': (59.80, 30.26), 'ULLP': (59.98, 29.68), 'ULMM': (68.78, 32.75), 'UUEE': (55.97, 37.41)}
+    grid = GridAggregator(54, 70, 28, 40, 2.0, coords)
+    batch = [decode_metar(s)[1] for s in [
+        "METAR ULLI 200930Z 32005MPS 9999 VCTS -SHRA BKN029CB 17/14 Q1000=",
+        "METAR ULLP 200930Z 30008G14MPS 0600 FG VV002 12/12 Q1001=",
+        "METAR ULMM 200930Z 22005MPS 9999 +TSRA BKN015CB 11/09 Q0998=",
+        "METAR UUEE 200930Z 18003MPS CAVOK 20/08 Q1015=",
+    ]]
+    print("изменены ячейки:", sorted(grid.update(batch)))
+    print("повторно:", sorted(grid.update(batch)))
+    for name in GRID_FIELDS:
+        cells = {i: v for i, v in enumerate(grid.fields[name]) if v == v}
+        print(f"{name:<17} {cells}")
@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Отрисовка декодированной сводки на нескольких языках без повторного разбора.
+Таблицы фраз каждого языка индексируются теми же кодами, что и словарь decode_metar
+(FEW, RA, коды покрытия ВПП, поле 'kind' ремарок ...); шаблоны строк компилируются
+один раз на язык (lru_cache). Русская таблица использует словари main7, поэтому
+текст на русском совпадает с выводом декодера (с точностью до порядка групп).
+
+    texts = render_many(metar_data, ('ru', 'en'))
+"""
+
+from fractions import Fraction
+from functools import lru_cache
+
+from main7 import (BRAKING, CLOUD_TYPES, CLOUDS, CORRECTION_MARKS, RUNWAY_COVER, RUNWAY_TYPE,
+                   TOKEN_DECODERS, render_runway_state, render_weather, weather_codes)
+
+# ==============================
+# Таблицы фраз
+# ==============================
+PHRASES = {
+    'ru': {
+        'templates': {
+            'station': "Аэродром: {code}",
+            'time': "Время наблюдения: {raw} UTC",
+            'calm': "Штиль, {speed} {unit}",
+            'wind_vrb': "Ветер переменный {speed} {unit}",
+            'wind': "Ветер {direction}° {speed} {unit}",
+            'gust': ", порывы {gust} {unit}",
+            'wind_var': "Вариабельность ветра: {from_:03d}°–{to:03d}°",
+            'vis_sm': "Видимость {sign}{miles} SM ({meters} м)",
+            'vis_10km': "Видимость ≥10 км",
+            'vis_dir': "Видимость {meters} м {direction}",
+            'vis_min': "Видимость минимальная {meters} м",
+            'vis_min_dir': ", в направлении {direction} — {meters} м",
+            'rvr': "RVR ВПП {runway}: {value} {trend}",
+            'weather': "Явления: {phrase}",
+            'nsw': "Явления: без значимых явлений",
+            'nsw_trend': "В прогнозе: без значимых явлений",
+            'cloud': "Облачность: {cover}{base}{type}",
+            'cloud_base': " основание ~{meters} м ({feet} ft)",
+            'cloud_base_none': " основание: нет данных",
+            'vv': "Вертикальная видимость {meters} м",
+            'vv_none': "Вертикальная видимость: нет данных",
+            'temp': "Температура {air}, точка росы {dew}",
+            'celsius': "{value}°C",
+            'no_data': "нет данных",
+            'qnh': "Давление QNH {hpa} гПа",
+            'altimeter': "Давление {inhg:.2f} inHg",
+            'ws': "Сдвиг ветра (WS)",
+            'ws_all': "Сдвиг ветра: на всех ВПП",
+            'ws_rwy': "Сдвиг ветра: на ВПП {runway}",
+            'trend': "Тренд {code}",
+            'trend_time': "  {prep} {hour:02d}:{minute:02d} UTC",
+            'remarks': "Ремарки:",
+            'remark': "  - {text}",
+            'remark_unknown': "  - (неизвестная ремарка) {code}",
+            'unknown': "(неизвестно) {raw}",
+        },
+        'units': {'MPS': 'м/с', 'KMH': 'км/ч', 'KT': 'уз.'},
+        'above_below': {'above': 'более ', 'below': 'менее '},
+        'rvr_trend': {'U': 'улучшалась', 'D': 'ухудшалась', 'N': 'без изменений'},
+        'trend_prep': {'from': 'с', 'till': 'до', 'at': 'в'},
+        'clouds': CLOUDS,
+        'cloud_types': CLOUD_TYPES,
+        # Явления и состояние ВПП отрисовываются функциями main7 (с учётом грамматики)
+        'runway_type': RUNWAY_TYPE,
+        'runway_cover': RUNWAY_COVER,
+        'braking': BRAKING,
+        'correction': CORRECTION_MARKS,
+        'flags': {'auto': "Автоматическое наблюдение", 'nil': "Сводка отсутствует (NIL)",
+                  'maintenance': "Станции требуется техническое обслуживание"},
+        # Ремарки по полю 'kind' словаря ремарки; ремарки без шаблона выводятся
+        # описанием декодера ('description')
+        'remarks': {
+            'qfe': "Давление QFE {mmhg} мм рт.ст.{hpa_text}",
+            'qbb': "Нижняя граница облаков {value_m} м",
+            'slp': "Давление на уровне моря {hpa:.1f} гПа",
+            'temp_tenths': "Температура {air_celsius:.1f}°C, точка росы {dew_point_celsius:.1f}°C",
+            'pk_wnd': "Пиковый ветер {direction}° {speed} уз. в {when} UTC",
+            'precip_hour': "Осадки за час {inches:.2f} дюйма ({mm:.1f} мм)",
+        },
+        'remark_hpa': " ({hpa} гПа)",
+    },
+    'en': {
+        'templates': {
+            'station': "Aerodrome: {code}",
+            'time': "Observed at: {raw} UTC",
+            'calm': "Calm, {speed} {unit}",
+            'wind_vrb': "Wind variable {speed} {unit}",
+            'wind': "Wind {direction}° {speed} {unit}",
+            'gust': ", gusts {gust} {unit}",
+            'wind_var': "Wind varying between {from_:03d}° and {to:03d}°",
+            'vis_sm': "Visibility {sign}{miles} SM ({meters} m)",
+            'vis_10km': "Visibility 10 km or more",
+            'vis_dir': "Visibility {meters} m {direction}",
+            'vis_min': "Visibility {meters} m",
+            'vis_min_dir': ", towards {direction} {meters} m",
+            'rvr': "RVR runway {runway}: {value} {trend}",
+            'weather': "Weather: {phrase}",
+            'nsw': "Weather: no significant weather",
+            'nsw_trend': "Forecast: no significant weather",
+            'cloud': "Clouds: {cover}{base}{type}",
+            'cloud_base': " at ~{meters} m ({feet} ft)",
+            'cloud_base_none': " base not available",
+            'vv': "Vertical visibility {meters} m",
+            'vv_none': "Vertical visibility: not available",
+            'temp': "Temperature {air}, dew point {dew}",
+            'celsius': "{value}°C",
+            'no_data': "not available",
+            'qnh': "QNH {hpa} hPa",
+            'altimeter': "Altimeter {inhg:.2f} inHg",
+            'ws': "Wind shear (WS)",
+            'ws_all': "Wind shear: all runways",
+            'ws_rwy': "Wind shear: runway {runway}",
+            'trend': "Trend {code}",
+            'trend_time': "  {prep} {hour:02d}:{minute:02d} UTC",
+            'remarks': "Remarks:",
+            'remark': "  - {text}",
+            'remark_unknown': "  - (unknown remark) {code}",
+            'unknown': "(unknown) {raw}",
+            'rwy_header': "Runway {runway} state:",
+            'rwy_all': "State of all runways:",
+            'rwy_repeat': "Runway state: repeated from previous report",
+            'rwy_cleared': "Runway {runway} state: cleared",
+            'rwy_closed': "Runway {runway} state: closed",
+            'rwy_snoclo': "Aerodrome closed due to snow",
+            'rwy_cleaning': "Runway closed for clearing",
+            'rwy_code': "  State code: {code}",
+            'rwy_deposit': "  Deposit: {value}",
+            'rwy_cover': "  Extent: {value}",
+            'rwy_depth': "  Depth: {value}",
+            'rwy_braking': "  Braking action: {value}",
+            'rwy_friction': "  Braking action: coefficient ≈ {value:.2f}",
+            'rwy_braking_code': "  Braking action: code {value}",
+        },
+        'units': {'MPS': 'm/s', 'KMH': 'km/h', 'KT': 'kt'},
+        'above_below': {'above': 'more than ', 'below': 'less than '},
+        'rvr_trend': {'U': 'increasing', 'D': 'decreasing', 'N': 'no change'},
+        'trend_prep': {'from': 'from', 'till': 'until', 'at': 'at'},
+        'clouds': {
+            'FEW': 'few (1–2/8)', 'SCT': 'scattered (3–4/8)', 'BKN': 'broken (5–7/8)', 'OVC': 'overcast (8/8)',
+            'NSC': 'no significant cloud', 'SKC': 'sky clear', 'CLR': 'clear',
+            'CAVOK': 'CAVOK (visibility 10 km or more, no cloud or weather)',
+        },
+        'cloud_types': {'CB': 'cumulonimbus (CB)', 'TCU': 'towering cumulus (TCU)'},
+        'correction': {'COR': 'Corrected report (COR)', 'AMD': 'Amended report (AMD)'},
+        'flags': {'auto': "Automated observation", 'nil': "Missing report (NIL)",
+                  'maintenance': "Station requires maintenance"},
+        'intensity': {'+': 'heavy ', '-': 'light ', '': ''},
+        'descriptors': {
+            'MI': 'shallow', 'BC': 'patches of', 'PR': 'partial', 'DR': 'low drifting', 'BL': 'blowing',
+            'SH': 'showers of', 'TS': 'thunderstorm', 'FZ': 'freezing',
+        },
+        # Дескрипторы без явления (VCSH, VCTS, TS)
+        'descriptors_alone': {'SH': 'showers', 'TS': 'thunderstorm', 'BL': 'blowing', 'DR': 'drifting'},
+        'phenomena': {
+            'DZ': 'drizzle', 'RA': 'rain', 'SN': 'snow', 'SG': 'snow grains', 'IC': 'ice crystals',
+            'PL': 'ice pellets', 'GR': 'hail', 'GS': 'small hail/snow pellets', 'UP': 'unknown precipitation',
+            'BR': 'mist', 'FG': 'fog', 'FU': 'smoke', 'VA': 'volcanic ash', 'DU': 'dust', 'SA': 'sand',
+            'HZ': 'haze', 'PY': 'spray', 'PO': 'dust/sand whirls', 'SQ': 'squalls', 'DS': 'duststorm',
+            'SS': 'sandstorm', 'DRSN': 'low drifting snow', 'BLSN': 'blowing snow', 'TS': 'thunderstorm',
+        },
+        'runway_type': {
+            '0': 'dry', '1': 'damp', '2': 'wet or water patches', '3': 'rime or frost', '4': 'dry snow',
+            '5': 'wet snow', '6': 'slush', '7': 'ice', '8': 'compacted snow', '9': 'frozen ruts or ridges',
+            '/': 'not reported',
+        },
+        'runway_cover': {'1': '10% or less', '2': '11–25%', '5': '26–50%', '9': '51–100%', '/': 'not reported'},
+        'braking': {
+            '95': 'good (≥0.40)', '94': 'medium to good (0.36–0.39)', '93': 'medium (0.30–0.35)',
+            '92': 'medium to poor (0.26–0.29)', '91': 'poor (≤0.25)', '99': 'unreliable', '//': 'not reported',
+        },
+        'depth': {'lt1': "less than 1 mm", 'mm': "{value} mm", 'cm': "{value} cm",
+                  'closed': "runway not operational", 'code': "code {value}", 'none': "not reported"},
+        'remarks': {
+            'mt_obsc': "Mountains obscured",
+            'obst_obsc': "Obstacles obscured",
+            'qfe': "QFE {mmhg} mmHg{hpa_text}",
+            'qbb': "Cloud base {value_m} m",
+            'slp': "Sea level pressure {hpa:.1f} hPa",
+            'slp_missing': "Sea level pressure not available",
+            'temp_tenths': "Temperature {air_celsius:.1f}°C, dew point {dew_point_celsius:.1f}°C",
+            'pk_wnd': "Peak wind {direction}° {speed} kt at {when} UTC",
+            'precip_hour': "Hourly precipitation {inches:.2f} in ({mm:.1f} mm)",
+            'ao1': "Automated station without precipitation discriminator",
+            'ao2': "Automated station with precipitation discriminator",
+            'pressure_rising': "Pressure rising rapidly",
+            'pressure_falling': "Pressure falling rapidly",
+            'ts_sensor_off': "Thunderstorm sensor not available",
+            'pwi_sensor_off': "Precipitation identifier not available",
+            'fzra_sensor_off': "Freezing rain sensor not available",
+            'precip_gauge_off': "Precipitation gauge not available",
+            'rvr_missing': "RVR not available",
+            'maintenance': "Station requires maintenance",
+        },
+        'remark_hpa': " ({hpa} hPa)",
+    },
+}
+
+LOCALES = tuple(PHRASES)
+
+
+@lru_cache(maxsize=None)
+def compiled(locale: str) -> dict:
+    """Скомпилированные шаблоны языка: {имя: функция форматирования}."""
+    table = PHRASES[locale]
+    result = {key: tpl.format for key, tpl in table['templates'].items()}
+    result.update({('remark', key): tpl.format for key, tpl in table['remarks'].items()})
+    if 'depth' in table:
+        result.update({('depth', key): tpl.format for key, tpl in table['depth'].items()})
+    return result
+
+
+# ==============================
+# Отрисовка разделов
+# ==============================
+def _miles_text(miles: float) -> str:
+    frac = Fraction(miles).limit_denominator(16)
+    whole, rest = divmod(frac.numerator, frac.denominator)
+    if not rest:
+        return str(whole)
+    return f"{whole} {rest}/{frac.denominator}" if whole else f"{rest}/{frac.denominator}"
+
+
+def _celsius(t: dict, value) -> str:
+    if value is None:
+        return t['no_data']()
+    return t['celsius'](value=f"-{abs(value):02d}" if value < 0 else f"{value:02d}")
+
+
+def _weather_en(table: dict, w: dict) -> str:
+    intensity = table['intensity'][w['intensity']]
+    descriptors = [d for d in w['descriptors'] if d != 'TS']
+    phenomena = [table['phenomena'][p] for p in w['phenomena']]
+    if phenomena:
+        words = ' '.join(table['descriptors'][d] for d in descriptors)
+        phrase = f"{words} {' and '.join(phenomena)}".strip()
+    else:
+        # Группа из одних дескрипторов: 'showers', а не 'showers of'
+        alone = table['descriptors_alone']
+        phrase = ' '.join(alone.get(d, table['descriptors'][d]) for d in descriptors)
+    if 'TS' in w['descriptors']:
+        phrase = f"thunderstorm with {phrase}" if phrase else 'thunderstorm'
+    phrase = intensity + phrase
+    if w['recent']:
+        phrase = 'recent ' + phrase
+    if w['vicinity']:
+        phrase += ' in the vicinity'
+    return phrase
+
+
+def _weather(locale: str, w: dict) -> str:
+    codes = weather_codes(w)
+    if locale == 'ru':
+        return render_weather(codes)
+    return _weather_en(PHRASES[locale], codes)
+
+
+def _runway(locale: str, rec: dict) -> str:
+    text = _runway_state(locale, rec)
+    # R99 с подставленным состоянием из предыдущей сводки (metar_state)
+    for prev in rec.get('repeat_of', ()):
+        text += "\n  " + _runway_state(locale, prev).replace("\n", "\n  ")
+    return text
+
+
+def _runway_state(locale: str, rec: dict) -> str:
+    if locale == 'ru':
+        return render_runway_state(rec)
+    t, table = compiled(locale), PHRASES[locale]
+    kind = rec['kind']
+    if kind == 'cleared': return t['rwy_cleared'](runway=rec['runway'])
+    if kind == 'closed': return t['rwy_closed'](runway=rec['runway'])
+    if kind == 'snoclo': return t['rwy_snoclo']()
+    if kind == 'cleaning': return t['rwy_cleaning']()
+    if rec['all_runways']: res = [t['rwy_all']()]
+    elif rec['repeat']: res = [t['rwy_repeat']()]
+    else: res = [t['rwy_header'](runway=rec['runway'])]
+    if rec['braking_code'] is None and kind == 'body':
+        res.append(t['rwy_code'](code=rec['depth_code']))
+        return "\n".join(res)
+    if rec['deposit'] is not None:
+        res.append(t['rwy_deposit'](value=table['runway_type'].get(rec['deposit'], rec['deposit'])))
+    if rec['coverage'] is not None:
+        res.append(t['rwy_cover'](value=table['runway_cover'].get(rec['coverage'], rec['coverage'])))
+    if rec['depth_code'] is not None:
+        code, mm = rec['depth_code'], rec['depth_mm']
+        if mm is not None:
+            depth = t['depth', 'lt1']() if mm == 0 else t['depth', 'mm'](value=mm) if mm <= 90 else t['depth', 'cm'](value=mm // 10)
+        elif code.isdigit():
+            depth = t['depth', 'closed']() if int(code) == 99 else t['depth', 'code'](value=code)
+        else:
+            depth = t['depth', 'none']()
+        res.append(t['rwy_depth'](value=depth))
+    brake = rec['braking_code']
+    if brake in table['braking']:
+        res.append(t['rwy_braking'](value=table['braking'][brake]))
+    elif rec['friction'] is not None:
+        res.append(t['rwy_friction'](value=rec['friction']))
+    else:
+        res.append(t['rwy_braking_code'](value=brake))
+    return "\n".join(res)
+
+
+def _remark(locale: str, rm: dict) -> str:
+    t, table = compiled(locale), PHRASES[locale]
+    desc, kind = rm.get('description'), rm.get('kind')
+    if kind == 'unknown':
+        return t['remark_unknown'](code=rm['code'])
+    fmt = t.get(('remark', kind))
+    if kind == 'pk_wnd' and 'direction' not in rm:
+        fmt = None
+    if fmt is None:
+        # Ремарка без шаблона: описание без параметров, на языке оригинала
+        return t['remark'](text=desc if locale == 'ru' else f"{rm['code']}: {desc}")
+    fields = dict(rm)
+    fields['hpa_text'] = table['remark_hpa'].format(hpa=rm['hpa']) if kind == 'qfe' and 'hpa' in rm else ''
+    if kind == 'pk_wnd':
+        fields['when'] = (f"{rm['hour']:02d}:{rm['minute']:02d}" if rm['hour'] is not None
+                          else f"xx:{rm['minute']:02d}")
+    return t['remark'](text=fmt(**fields))
+
+
+# Отрисовка групп подключаемых декодеров: (ключ словаря, язык) -> функция(запись) -> строка
+PLUGIN_RENDERERS = {}
+
+
+def register_renderer(key: str, locale: str, renderer):
+    """Регистрирует отрисовку записей подключаемого декодера с ключом key на языке locale."""
+    PLUGIN_RENDERERS[key, locale] = renderer
+
+
+def _plugged(locale: str, key: str, rec: dict) -> str:
+    renderer = PLUGIN_RENDERERS.get((key, locale))
+    if renderer is not None:
+        return renderer(rec)
+    # Без отрисовки для языка — текст самого декодера, сохранённый в записи при разборе
+    if 'decoded_text' in rec:
+        return rec['decoded_text']
+    return compiled(locale)['unknown'](raw=rec.get('raw', ''))
+
+
+def _block_lines(locale: str, block: dict, in_trend: bool) -> list[str]:
+    t, table = compiled(locale), PHRASES[locale]
+    lines = []
+    wind = block.get('wind')
+    if wind and 'speed' in wind:
+        unit = table['units'][wind['unit']]
+        if wind['direction'] == 'VRB':
+            text = t['wind_vrb'](speed=wind['speed'], unit=unit)
+        elif wind['direction'] == 0:
+            text = t['calm'](speed=wind['speed'], unit=unit)
+        else:
+            text = t['wind'](direction=wind['direction'], speed=wind['speed'], unit=unit)
+        if wind['gust'] is not None:
+            text += t['gust'](gust=wind['gust'], unit=unit)
+        lines.append(text)
+    if wind and 'variability' in wind:
+        lines.append(t['wind_var'](from_=wind['variability']['from'], to=wind['variability']['to']))
+
+    vis = block.get('visibility')
+    if vis:
+        if vis['unit'] == 'SM':
+            text = t['vis_sm'](sign=table['above_below'].get(vis['qualifier'], ''),
+                               miles=_miles_text(vis['statute_miles']), meters=vis['meters'])
+        elif vis['meters'] == 9999:
+            text = t['vis_10km']()
+        elif vis.get('direction'):
+            text = t['vis_dir'](meters=vis['meters'], direction=vis['direction'])
+        else:
+            text = t['vis_min'](meters=vis['meters'])
+        minimum = vis.get('minimum')
+        for g in vis.get('directional') or ([minimum] if minimum else ()):
+            if g['direction']:
+                text += t['vis_min_dir'](direction=g['direction'], meters=g['meters'])
+            else:
+                text = t['vis_min'](meters=g['meters'])
+        lines.append(text)
+
+    for r in block.get('rvr', ()):
+        val = r['value_raw']
+        unit = 'ft' if r.get('unit') == 'FT' else 'м' if locale == 'ru' else 'm'
+        value = f">{val[1:]} {unit}" if val[0] == 'P' else f"<{val[1:]} {unit}" if val[0] == 'M' else f"{int(val)} {unit}"
+        if r.get('value_max'):
+            value += f"–{r['value_max'].lstrip('PM')} {unit}"
+        lines.append(t['rvr'](runway=r['runway'], value=value,
+                              trend=table['rvr_trend'].get(r['trend'], '')).strip())
+
+    for w in block.get('weather', ()):
+        if w['raw'] == 'NSW':
+            lines.append(t['nsw_trend']() if in_trend else t['nsw']())
+        else:
+            lines.append(t['weather'](phrase=_weather(locale, w)))
+
+    for c in block.get('clouds', ()):
+        cover = table['clouds'].get(c['code'], c['code'])
+        if c['code'] == 'CAVOK':
+            lines.append(t['cloud'](cover=cover, base='', type=''))
+            continue
+        if c['height_ft'] is not None:
+            base = t['cloud_base'](meters=c['height_ft'] // 100 * 30, feet=c['height_ft'])
+        elif '///' in c['raw'][3:]:
+            base = t['cloud_base_none']()
+        else:
+            base = ''
+        ctype = ' ' + table['cloud_types'].get(c['type'], c['type']) if c['type'] else ''
+        lines.append(t['cloud'](cover=cover, base=base, type=ctype))
+
+    vv = block.get('vertical_visibility')
+    if vv:
+        lines.append(t['vv_none']() if vv['height_m'] is None else t['vv'](meters=vv['height_m']))
+
+    temp = block.get('temperature')
+    if temp:
+        lines.append(t['temp'](air=_celsius(t, temp['air_celsius']), dew=_celsius(t, temp['dew_point_celsius'])))
+
+    pressure = block.get('pressure')
+    if pressure:
+        if 'qnh_hpa' in pressure:
+            lines.append(t['qnh'](hpa=pressure['qnh_hpa']))
+        else:
+            lines.append(t['altimeter'](inhg=pressure['altimeter_inhg']))
+
+    for rec in block.get('runway_state', ()):
+        lines.append(_runway(locale, rec) if 'kind' in rec else t['unknown'](raw=rec['raw']))
+
+    for ws in block.get('wind_shear', ()):
+        runways = ws.get('runways')
+        if runways == 'ALL':
+            lines.append(t['ws_all']())
+        elif runways:
+            lines.append(t['ws_rwy'](runway=runways[1:]))
+        else:
+            lines.append(t['ws']())
+
+    # Группы подключаемых декодеров (main7.TOKEN_DECODERS)
+    if TOKEN_DECODERS:
+        for key in TOKEN_DECODERS.keys():
+            for rec in block.get(key, ()):
+                lines.append(_plugged(locale, key, rec))
+
+    for raw in block.get('unknown', ()):
+        lines.append(t['unknown'](raw=raw))
+    return lines
+
+
+def render(metar_data: dict, locale: str = 'ru') -> str:
+    """Текст сводки на языке locale по словарю decode_metar."""
+    t, table = compiled(locale), PHRASES[locale]
+    lines = []
+    if 'station' in metar_data:
+        lines.append(t['station'](code=metar_data['station']['code']))
+    if 'correction' in metar_data:
+        lines.append(table['correction'][metar_data['correction']])
+    for key, text in table['flags'].items():
+        if metar_data.get(key):
+            lines.append(text)
+    if 'time' in metar_data:
+        lines.append(t['time'](raw=metar_data['time']['raw']))
+    lines.extend(_block_lines(locale, metar_data, False))
+    for block in metar_data.get('trend', ()):
+        lines.append(t['trend'](code=block['code']))
+        for key in ('from', 'till', 'at'):
+            q = block.get(key)
+            if q is not None and 'hour' in q:
+                lines.append(t['trend_time'](prep=table['trend_prep'][key], hour=q['hour'], minute=q['minute']))
+        lines.extend(_block_lines(locale, block, True))
+    remarks = metar_data.get('remarks')
+    if remarks and remarks['decoded']:
+        lines.append(t['remarks']())
+        lines.extend(_remark(locale, rm) for rm in remarks['decoded'])
+    return "\n".join(lines)
+
+
+def render_many(metar_data: dict, locales=LOCALES) -> dict:
+    """{язык: текст} для одного разобранного словаря."""
+    return {locale: render(metar_data, locale) for locale in locales}
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    import time
+
+    from main7 import decode_metar
+
+    samples = [
+        "METAR ULLI 191700Z 29008MPS 2200 0900SE R28L/1900U R28R/2000U +SHSN BLSN SCT011 BKN019CB OVC033 M06/M07 Q0996 R28L/452030 R28R/490535 BECMG 6000 NSW=",
+        "METAR URMM 021630Z 11005MPS 4400 -SHRA BR BKN004 OVC021CB 12/11 Q1023 R11/190060 TEMPO FM1700 TL1800 0300 -SHRA FG BKN002 BKN030CB RMK MT OBSC QFE739/0986",
+        "METAR KJFK 261351Z AUTO 31015G25KT 280V340 1 1/2SM -RA BR FEW008 OVC015 12/10 A2992 WS R04R RMK AO2 SLP132 T01220100 PK WND 31030/1320",
+    ]
+    same = 0
+    for s in samples:
+        text, data = decode_metar(s)
+        texts = render_many(data)
+        same += sorted(texts['ru'].splitlines()) == sorted(text.splitlines())
+        print(texts['en'], end="\n\n")
+    print(f"русский текст совпадает с выводом декодера: {same} из {len(samples)}")
+
+    # Группы из одних дескрипторов, подключаемые декодеры и R99 по состоянию станции
+    from metar_plugins import register_all
+    from metar_state import StationStateStore
+
+    for tok, expected in (('VCSH', 'showers in the vicinity'), ('VCTS', 'thunderstorm in the vicinity'),
+                          ('TS', 'thunderstorm'), ('+TSRA', 'heavy thunderstorm with rain')):
+        phrase = render(decode_metar(f"METAR ULLI 101330Z 23002MPS 9999 {tok} SCT020CB 12/10 Q1009")[1], 'en')
+        assert f"Weather: {expected}\n" in phrase, (tok, phrase)
+    register_all()
+    state = StationStateStore()
+    decode_metar("METAR ULLI 101300Z 23002MPS 9999 SCT020 M01/M03 Q1009 R28L/550539=", state=state)
+    plugged = "METAR ULLI 101330Z 23002MPS 9999 SCT020 M01/M03 Q1009 R99/////// W05/S2 BLU="
+    text, data = decode_metar(plugged, state=state)
+    # Отрисовки плагинов регистрируются в импортированном модуле, а не в __main__
+    import metar_i18n
+    texts = metar_i18n.render_many(data)
+    print(texts['en'], end="\n\n")
+    assert sorted(texts['ru'].splitlines()) == sorted(text.splitlines()), texts['ru']
+
+    data = decode_metar(samples[1])[1]
+    n = 5000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        decode_metar(samples[1])
+    t1 = time.perf_counter()
+    for _ in range(n):
+        render_many(data)
+    t2 = time.perf_counter()
+    print(f"разбор {n / (t1 - t0):,.0f}/с, отрисовка ru+en {n / (t2 - t1):,.0f}/с")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Быстрая сериализация словарей decode_metar в JSON и JSON Lines.
+Если установлен orjson, используется он; иначе — один заранее созданный
+компактный кодировщик стандартного json (без отступов, без проверки циклов).
+"""
+
+import io
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен
+    orjson = None
+
+# json.dumps с нестандартными параметрами создаёт новый JSONEncoder на каждый вызов;
+# переиспользуемый экземпляр избавляет от этого и включает C-ускоритель кодирования.
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), check_circular=False)
+_DECODER = json.JSONDecoder()
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def dumps(data: dict) -> str:
+    """Компактная JSON-строка (кириллица без экранирования)."""
+    if orjson is not None:
+        return orjson.dumps(data).decode('utf-8')
+    return _ENCODER.encode(data)
+
+
+def dumps_bytes(data: dict) -> bytes:
+    """То же, что dumps(), но сразу в UTF-8 — для записи в файлы и сокеты."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return _ENCODER.encode(data).encode('utf-8')
+
+
+def loads(s: str | bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(s)
+    if isinstance(s, bytes):
+        s = s.decode('utf-8')
+    return _DECODER.decode(s)
+
+
+class JsonlWriter:
+    """
+    Потоковая запись JSON Lines с буферизацией: одна строка на сводку.
+    target — путь к файлу или открытый двоичный поток.
+    """
+
+    def __init__(self, target, buffer_size: int = 1 << 20, append: bool = False):
+        if isinstance(target, (str, bytes)) or hasattr(target, '__fspath__'):
+            self._fh = open(target, 'ab' if append else 'wb', buffering=buffer_size)
+            self._owned = True
+        else:
+            self._fh = target
+            self._owned = False
+        self.count = 0
+
+    def write(self, data: dict):
+        self._fh.write(dumps_bytes(data) + b'\n')
+        self.count += 1
+
+    def write_many(self, items):
+        for data in items:
+            self.write(data)
+
+    def flush(self):
+        self._fh.flush()
+
+    def close(self):
+        if self._owned:
+            self._fh.close()
+        else:
+            self._fh.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_jsonl(source, buffer_size: int = 1 << 20):
+    """Генератор словарей из файла JSON Lines (путь или двоичный поток); пустые строки пропускаются."""
+    fh = open(source, 'rb', buffering=buffer_size) if not hasattr(source, 'read') else source
+    try:
+        for line in fh:
+            if line.strip():
+                yield loads(line)
+    finally:
+        if fh is not source:
+            fh.close()
+
+
+# ==============================
+# Бенчмарк против json.dumps
+# ==============================
+if __name__ == "__main__":
+    import sys
+    import timeit
+
+    from main7 import decode_metar
+
+    samples = [
+        "METAR ULLI 101330Z 23002MPS 5000 -SHSN SCT006 BKN020CB OVC036 M01/M01 Q1009 RESHSN R28L/550539 R28R/590537 TEMPO 0800 +SHSN FZRA BKN004 BKN016CB RMK OBST OBSC=",
+        "METAR URMM 021630Z 11005MPS 4400 -SHRA BR BKN004 OVC021CB 12/11 Q1023 R11/190060 TEMPO 0300 -SHRA FG BKN002 BKN030CB RMK MT OBSC OBST OBSC QFE739/0986",
+    ]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    dicts = [decode_metar(s)[1] for s in samples]
+    batch = [dicts[k % len(dicts)] for k in range(n)]
+
+    # Проверка обратного преобразования
+    buf = io.BytesIO()
+    with JsonlWriter(buf) as w:
+        w.write_many(dicts)
+    buf.seek(0)
+    assert list(read_jsonl(buf)) == dicts
+
+    cases = {
+        'json.dumps(indent=2)': lambda: [json.dumps(d, indent=2, ensure_ascii=False) for d in batch],
+        'json.dumps(compact)': lambda: [json.dumps(d, ensure_ascii=False, separators=(',', ':')) for d in batch],
+        f'dumps() [{BACKEND}]': lambda: [dumps(d) for d in batch],
+        f'dumps_bytes() [{BACKEND}]': lambda: [dumps_bytes(d) for d in batch],
+    }
+    for name, fn in cases.items():
+        dt = min(timeit.repeat(fn, number=1, repeat=3))
+        print(f"{name:<28} {n / dt:>12,.0f} сводок/с")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Потоковая обработка больших файлов сводок с контрольными точками.
+Вход — по одной сводке в строке (текст или JSON Lines с полем raw_field), выход —
+JSON Lines с результатами decode_metar. Вход читается порциями по chunk_size строк,
+поэтому память ограничена размером порции. После записи каждой порции выход
+сбрасывается на диск, а в файл контрольной точки атомарно (os.replace) записываются
+смещение во входе и размер выхода. При перезапуске выход обрезается до сохранённого
+размера, и обработка продолжается ровно с того места, где остановилась.
+
+    python metar_pipeline.py input.txt output.jsonl [--chunk 5000] [--checkpoint output.jsonl.ckpt]
+"""
+
+import json
+import os
+import sys
+import time
+
+from main7 import DECODER_VERSION, decode_metar
+from metar_json import dumps_bytes, loads
+
+
+def write_checkpoint(path: str, state: dict):
+    """Атомарная запись: временный файл, fsync, затем os.replace."""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def read_checkpoint(path: str) -> dict | None:
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+class Pipeline:
+    """
+    input_path / output_path — входной и выходной файлы;
+    checkpoint_path         — файл контрольной точки (по умолчанию output_path + '.ckpt');
+    chunk_size              — строк в порции;
+    raw_field               — поле со сводкой, если вход — JSON Lines;
+    decode_kwargs           — дополнительные параметры decode_metar (normalize=True, derived=True и т.п.).
+    """
+
+    def __init__(self, input_path: str, output_path: str, checkpoint_path: str | None = None,
+                 chunk_size: int = 5000, raw_field: str = 'raw', decode_kwargs: dict | None = None,
+                 progress_every: float = 2.0, log=sys.stderr):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or output_path + '.ckpt'
+        self.chunk_size = chunk_size
+        self.raw_field = raw_field
+        self.decode_kwargs = decode_kwargs or {}
+        self.progress_every = progress_every
+        self.log = log
+
+    def _state(self) -> dict:
+        state = read_checkpoint(self.checkpoint_path)
+        if state is None:
+            return {'input': os.path.abspath(self.input_path), 'input_offset': 0, 'output_bytes': 0,
+                    'records': 0, 'errors': 0, 'decoder_version': DECODER_VERSION, 'done': False}
+        if state['decoder_version'] != DECODER_VERSION:
+            raise ValueError(f"{self.checkpoint_path}: контрольная точка версии декодера "
+                             f"{state['decoder_version']}, текущая {DECODER_VERSION}")
+        if state['input'] != os.path.abspath(self.input_path):
+            raise ValueError(f"{self.checkpoint_path}: контрольная точка для другого входа {state['input']}")
+        return state
+
+    def _raw(self, line: bytes) -> str:
+        text = line.decode('utf-8', errors='replace').strip()
+        if text.startswith('{'):
+            return loads(text)[self.raw_field]
+        return text
+
+    def _decode_chunk(self, lines: list[bytes]) -> tuple[bytes, int, int]:
+        out, records, errors = [], 0, 0
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                raw = self._raw(line)
+                _, data = decode_metar(raw, **self.decode_kwargs)
+                out.append(dumps_bytes({'raw': raw, 'report': data}))
+                records += 1
+            except Exception as exc:
+                out.append(dumps_bytes({'raw': line.decode('utf-8', errors='replace').strip(), 'error': repr(exc)}))
+                errors += 1
+        return b''.join(x + b'\n' for x in out), records, errors
+
+    def _progress(self, state: dict, total: int, started: float, start_offset: int, final: bool = False):
+        if self.log is None:
+            return
+        dt = time.perf_counter() - started
+        done = state['input_offset'] - start_offset
+        rate = done / dt if dt > 0 else 0.0
+        eta = (total - state['input_offset']) / rate if rate else float('inf')
+        pct = 100.0 * state['input_offset'] / total if total else 100.0
+        print(f"{'готово' if final else 'ход'}: {pct:5.1f}% сводок {state['records']} ошибок {state['errors']}, "
+              f"{rate / 1e6:.2f} МБ/с, осталось ~{eta:.0f} с", file=self.log)
+
+    def run(self, max_chunks: int | None = None) -> dict:
+        """
+        Обрабатывает вход до конца (или max_chunks порций) и возвращает состояние.
+        Повторный вызов после сбоя продолжает с последней контрольной точки.
+        """
+        state = self._state()
+        if state['done']:
+            return state
+        total = os.path.getsize(self.input_path)
+        started = last_progress = time.perf_counter()
+        start_offset = state['input_offset']
+        chunks = 0
+
+        # Выход открывается на дозапись и обрезается до размера из контрольной точки:
+        # частично записанная при сбое порция отбрасывается
+        mode = 'r+b' if os.path.exists(self.output_path) else 'w+b'
+        with open(self.input_path, 'rb') as src, open(self.output_path, mode) as dst:
+            dst.truncate(state['output_bytes'])
+            dst.seek(state['output_bytes'])
+            src.seek(state['input_offset'])
+            while max_chunks is None or chunks < max_chunks:
+                lines = []
+                offset = state['input_offset']
+                for _ in range(self.chunk_size):
+                    line = src.readline()
+                    if not line:
+                        break
+                    lines.append(line)
+                    offset += len(line)
+                if not lines:
+                    state['done'] = True
+                    write_checkpoint(self.checkpoint_path, state)
+                    break
+                payload, records, errors = self._decode_chunk(lines)
+                dst.write(payload)
+                dst.flush()
+                os.fsync(dst.fileno())
+                state.update(input_offset=offset, output_bytes=state['output_bytes'] + len(payload),
+                             records=state['records'] + records, errors=state['errors'] + errors)
+                write_checkpoint(self.checkpoint_path, state)
+                chunks += 1
+                if self.progress_every and time.perf_counter() - last_progress >= self.progress_every:
+                    self._progress(state, total, started, start_offset)
+                    last_progress = time.perf_counter()
+        self._progress(state, total, started, start_offset, final=state['done'])
+        return state
+
+
+# ==============================
+# Запуск из командной строки
+# ==============================
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Декодирование файла сводок с контрольными точками")
+    parser.add_argument('input', nargs='?')
+    parser.add_argument('output', nargs='?')
+    parser.add_argument('--chunk', type=int, default=5000)
+    parser.add_argument('--checkpoint')
+    parser.add_argument('--normalize', action='store_true')
+    parser.add_argument('--derived', action='store_true')
+    args = parser.parse_args()
+
+    if args.input and args.output:
+        Pipeline(args.input, args.output, args.checkpoint, chunk_size=args.chunk,
+                 decode_kwargs={'normalize': args.normalize, 'derived': args.derived}).run()
+        sys.exit(0)
+
+    # Демонстрация: прерванный прогон и продолжение дают тот же выход, что и прогон целиком
+    samples = [
+        "METAR ULLI 101330Z 23002MPS 5000 -SHSN SCT006 BKN020CB OVC036 M01/M01 Q1009 RESHSN R28L/550539 TEMPO 0800 +SHSN=",
+        '{"raw": "METAR URMM 021630Z 11005MPS 4400 -SHRA BR BKN004 OVC021CB 12/11 Q1023 RMK QFE739/0986"}',
+        "METAR KJFK 261351Z 31015G25KT 1 1/2SM -RA BR FEW008 OVC015 12/10 A2992 RMK AO2 SLP132",
+    ]
+    tmp = tempfile.mkdtemp()
+    src = os.path.join(tmp, 'input.txt')
+    with open(src, 'w', encoding='utf-8') as fh:
+        for k in range(30_000):
+            fh.write(samples[k % len(samples)] + '\n')
+    full, resumed = os.path.join(tmp, 'full.jsonl'), os.path.join(tmp, 'resumed.jsonl')
+
+    Pipeline(src, full, chunk_size=2000, log=None).run()
+    Pipeline(src, resumed, chunk_size=2000).run(max_chunks=4)
+    # Имитация сбоя посреди записи порции: мусор в конце выхода
+    with open(resumed, 'ab') as fh:
+        fh.write(b'{"raw": "METAR ULLI 1013')
+    state = Pipeline(src, resumed, chunk_size=2000).run()
+    with open(full, 'rb') as a, open(resumed, 'rb') as b:
+        print("выход после продолжения совпадает:", a.read() == b.read(), state)
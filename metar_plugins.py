@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Примеры подключаемых декодеров групп (см. main7.TokenDecoderRegistry):
+цветовые коды состояния военных аэродромов (BLU ... RED, BLACK) и группа
+температуры и состояния поверхности моря WTT/SS. Подключение: register_all().
+"""
+
+from main7 import register_token_decoder
+
+# Цветовое состояние аэродрома: (видимость м, нижняя граница облаков ft) — не хуже
+COLOR_STATES = {
+    'BLU': ('синий', 8000, 2500),
+    'WHT': ('белый', 5000, 1500),
+    'GRN': ('зелёный', 3700, 700),
+    'YLO1': ('жёлтый 1', 2500, 500),
+    'YLO2': ('жёлтый 2', 1600, 300),
+    'YLO': ('жёлтый', 1600, 300),
+    'AMB': ('янтарный', 800, 200),
+    'RED': ('красный', 0, 0),
+}
+
+SEA_STATE = {
+    '0': 'штиль', '1': 'рябь', '2': 'слабое волнение', '3': 'лёгкое волнение', '4': 'умеренное волнение',
+    '5': 'неспокойное море', '6': 'крупное волнение', '7': 'сильное волнение',
+    '8': 'очень сильное волнение', '9': 'исключительное волнение',
+}
+
+
+def decode_color(tok, m):
+    # BLACK перед цветом: аэродром закрыт по причинам, не связанным с погодой
+    black = tok.startswith('BLACK')
+    code = tok[5:] if black else tok
+    if code not in COLOR_STATES:
+        return None
+    name, vis, ceil = COLOR_STATES[code]
+    text = f"Цветовое состояние: {name} (видимость ≥{vis} м, облачность ≥{ceil} ft)"
+    if black:
+        text = "Аэродром закрыт (BLACK); " + text
+    return text, {'raw': tok, 'code': code, 'closed': black, 'visibility_m': vis, 'ceiling_ft': ceil}
+
+
+def decode_sea(tok, m):
+    temp = int(m.group(1).replace('M', '-'))
+    state = m.group(2)
+    text = f"Температура моря {temp}°C, состояние: {SEA_STATE[state]}"
+    return text, {'raw': tok, 'sea_celsius': temp, 'state': int(state)}
+
+
+def render_color_en(rec):
+    text = f"Colour state: {rec['code']} (visibility ≥{rec['visibility_m']} m, cloud ≥{rec['ceiling_ft']} ft)"
+    return "Aerodrome closed (BLACK); " + text if rec['closed'] else text
+
+
+def render_sea_en(rec):
+    return f"Sea temperature {rec['sea_celsius']}°C, state of sea {rec['state']}"
+
+
+def register_all():
+    for code in COLOR_STATES:
+        register_token_decoder(decode_color, token=code, key='color_state')
+    register_token_decoder(decode_color, prefix='BLACK', key='color_state')
+    register_token_decoder(decode_sea, pattern=r'W(M?\d{2})/S(\d)', key='sea')
+    # Отрисовка на английском для metar_i18n (русский текст даёт сам декодер)
+    from metar_i18n import register_renderer
+    register_renderer('color_state', 'en', render_color_en)
+    register_renderer('sea', 'en', render_sea_en)
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    import json
+    import timeit
+
+    from main7 import decode_metar
+
+    metar = "METAR EGVN 261350Z 24012KT 9999 FEW030 BKN045 12/06 Q1018 W15/S4 BLU BLACKGRN="
+    before = min(timeit.repeat(lambda: decode_metar(metar), number=2000, repeat=3))
+    register_all()
+    text, data = decode_metar(metar)
+    print(text)
+    print(json.dumps({k: data[k] for k in ('color_state', 'sea')}, ensure_ascii=False))
+    after = min(timeit.repeat(lambda: decode_metar(metar), number=2000, repeat=3))
+    print(f"без декодеров {2000 / before:,.0f}/с, с декодерами {2000 / after:,.0f}/с")
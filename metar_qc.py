@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Контроль качества декодированных сводок.
+Регулярные выражения пропускают любые синтаксически верные значения (Q0100, 45/50),
+поэтому после декодирования проверяются физические диапазоны температуры и давления,
+точка росы не выше температуры и скачки относительно предыдущей сводки станции.
+Проверки выполняются по колонкам пакета; результат — битовая маска флагов на сводку.
+"""
+
+import math
+from array import array
+
+from main7 import INHG_TO_HPA
+
+NAN = math.nan
+
+# Флаги контроля
+QC_TEMP_RANGE = 1 << 0
+QC_DEW_RANGE = 1 << 1
+QC_DEW_ABOVE_TEMP = 1 << 2
+QC_PRESSURE_RANGE = 1 << 3
+QC_TEMP_STEP = 1 << 4
+QC_DEW_STEP = 1 << 5
+QC_PRESSURE_STEP = 1 << 6
+
+QC_NAMES = {
+    QC_TEMP_RANGE: 'temp_range',
+    QC_DEW_RANGE: 'dew_range',
+    QC_DEW_ABOVE_TEMP: 'dew_above_temp',
+    QC_PRESSURE_RANGE: 'pressure_range',
+    QC_TEMP_STEP: 'temp_step',
+    QC_DEW_STEP: 'dew_step',
+    QC_PRESSURE_STEP: 'pressure_step',
+}
+
+# Физические пределы у поверхности
+TEMP_RANGE_C = (-90.0, 60.0)
+DEW_RANGE_C = (-100.0, 40.0)
+PRESSURE_RANGE_HPA = (870.0, 1090.0)
+
+# Допустимые изменения между соседними сводками станции не дальше STEP_WINDOW_MIN минут
+STEP_WINDOW_MIN = 180
+TEMP_STEP_C = 10.0
+PRESSURE_STEP_HPA = 10.0
+# Сколько согласованных сводок подряд подтверждают реальное изменение
+STEP_CONFIRM = 2
+
+MINUTES_WRAP = 31 * 24 * 60
+
+
+def qc_columns(reports) -> dict:
+    """Колонки для контроля: температура, точка росы (°C), давление (гПа), минута месяца."""
+    n = len(reports)
+    cols = {name: array('d', [NAN]) * n for name in ('temp_c', 'dew_c', 'pressure_hpa', 'minute')}
+    temp_c, dew_c, pressure, minute = cols['temp_c'], cols['dew_c'], cols['pressure_hpa'], cols['minute']
+    for k, data in enumerate(reports):
+        t = data.get('temperature')
+        if t:
+            if t['air_celsius'] is not None:
+                temp_c[k] = t['air_celsius']
+            if t['dew_point_celsius'] is not None:
+                dew_c[k] = t['dew_point_celsius']
+        p = data.get('pressure')
+        if p:
+            if 'qnh_hpa' in p:
+                pressure[k] = p['qnh_hpa']
+            elif 'altimeter_inhg' in p:
+                pressure[k] = p['altimeter_inhg'] * INHG_TO_HPA
+        tm = data.get('time')
+        if tm:
+            minute[k] = tm['day'] * 1440 + tm['hour'] * 60 + tm['minute']
+    return cols
+
+
+def range_flags(cols: dict) -> array:
+    """Флаги проверок, не зависящих от предыдущих сводок (NaN не проверяется)."""
+    t_lo, t_hi = TEMP_RANGE_C
+    d_lo, d_hi = DEW_RANGE_C
+    p_lo, p_hi = PRESSURE_RANGE_HPA
+    # Сравнения с NaN ложны, поэтому отсутствующие значения флагов не дают
+    return array('H', [
+        (QC_TEMP_RANGE if not t_lo <= t <= t_hi and t == t else 0)
+        | (QC_DEW_RANGE if not d_lo <= d <= d_hi and d == d else 0)
+        | (QC_DEW_ABOVE_TEMP if d > t else 0)
+        | (QC_PRESSURE_RANGE if not p_lo <= p <= p_hi and p == p else 0)
+        for t, d, p in zip(cols['temp_c'], cols['dew_c'], cols['pressure_hpa'])
+    ])
+
+
+def flag_names(mask: int) -> list[str]:
+    return [name for bit, name in QC_NAMES.items() if mask & bit]
+
+
+class QualityControl:
+    """
+    Пакетный контроль с памятью последних прошедших проверку значений по станциям
+    (для проверки скачков). Каждое значение хранится со своим временем, поэтому устаревшая
+    опорная величина перестаёт участвовать в проверке через STEP_WINDOW_MIN минут.
+    Если STEP_CONFIRM сводок подряд согласуются между собой, но не с опорной величиной,
+    изменение считается реальным: опорная величина заменяется, флаг снимается.
+    """
+
+    def __init__(self):
+        self.last = {}
+        self.pending = {}
+        self.flagged = 0
+
+    def _step(self, code, q: int, m: float, v: float, limit: float) -> bool:
+        """Проверка скачка величины q (0 — температура, 1 — точка росы, 2 — давление); True — скачок."""
+        ref = self.last.get((code, q))
+        if ref is not None and (m - ref[0]) % MINUTES_WRAP <= STEP_WINDOW_MIN and abs(v - ref[1]) > limit:
+            cand = self.pending.get((code, q))
+            count = cand[1] + 1 if cand is not None and abs(v - cand[0]) <= limit else 1
+            if count < STEP_CONFIRM:
+                self.pending[code, q] = (v, count)
+                return True
+        self.last[code, q] = (m, v)
+        self.pending.pop((code, q), None)
+        return False
+
+    def check(self, reports, annotate: bool = False) -> array:
+        """
+        Возвращает array('H') масок флагов по сводкам пакета.
+        annotate=True дополнительно записывает в словарь сводки ключ 'qc' со списком флагов.
+        """
+        cols = qc_columns(reports)
+        flags = range_flags(cols)
+        temp_c, dew_c, pressure, minute = cols['temp_c'], cols['dew_c'], cols['pressure_hpa'], cols['minute']
+        step = self._step
+        for k, data in enumerate(reports):
+            code = data.get('station', {}).get('code')
+            m = minute[k]
+            if code is None or m != m:
+                continue
+            f = flags[k]
+            # Скачок проверяется только у значений, прошедших проверку диапазона;
+            # при точке росы выше температуры обе величины в память не попадают
+            t, d, p = temp_c[k], dew_c[k], pressure[k]
+            if t == t and not f & (QC_TEMP_RANGE | QC_DEW_ABOVE_TEMP) and step(code, 0, m, t, TEMP_STEP_C):
+                f |= QC_TEMP_STEP
+            if d == d and not f & (QC_DEW_RANGE | QC_DEW_ABOVE_TEMP) and step(code, 1, m, d, TEMP_STEP_C):
+                f |= QC_DEW_STEP
+            if p == p and not f & QC_PRESSURE_RANGE and step(code, 2, m, p, PRESSURE_STEP_HPA):
+                f |= QC_PRESSURE_STEP
+            flags[k] = f
+        self.flagged += sum(1 for f in flags if f)
+        if annotate:
+            for data, f in zip(reports, flags):
+                data['qc'] = flag_names(f)
+        return flags
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    import time
+
+    from main7 import decode_metar
+
+    batch = [decode_metar(s)[1] for s in [
+        "METAR ULLI 101300Z 23002MPS 9999 SCT020 M01/M03 Q1009=",
+        "METAR ULLI 101330Z 23002MPS 9999 SCT020 14/M03 Q1009=",
+        "METAR ULLI 101400Z 23002MPS 9999 SCT020 M01/M02 Q0100=",
+        "METAR URMM 101330Z 11005MPS 9999 SCT020 45/50 Q1023=",
+        "METAR KJFK 101351Z 31015KT 10SM FEW008 12/10 A2992=",
+    ]]
+    qc = QualityControl()
+    for data, f in zip(batch, qc.check(batch)):
+        print(f"{data['station']['code']} {data['time']['raw']}: {flag_names(f) or 'ok'}")
+
+    # Реальное изменение: флаг только у первой сводки после скачка
+    qc = QualityControl()
+    seq = [decode_metar(f"METAR ULLI 10{hh}Z 23002MPS 9999 SCT020 {t} Q1009=")[1]
+           for hh, t in (('1300', 'M01/M03'), ('1330', '10/M03'), ('1400', '11/M03'), ('1430', '11/M03'))]
+    masks = [flag_names(f) for f in qc.check(seq)]
+    print("−1 → 10 → 11 → 11 °C:", masks)
+    assert masks == [[], ['temp_step'], [], []], masks
+
+    big = batch * 20_000
+    t0 = time.perf_counter()
+    QualityControl().check(big)
+    print(f"{len(big) / (time.perf_counter() - t0):,.0f} сводок/с")
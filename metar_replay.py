@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Воспроизведение архивов METAR с ускорением времени.
+Архивы (по одной сводке в строке, допускается .gz) читаются потоково, сводки
+декодируются выбранным движком, упорядочиваются по времени наблюдения (блок 'time')
+в скользящем окне и выдаются в приёмники с темпом speed× реального времени
+(speed=0 — без задержек). По ходу работы выводятся скорость и распределение
+задержки декодирования.
+
+    python metar_replay.py archive.txt [archive2.txt.gz ...] [--speed 60] [--out out.jsonl|out.sqlite]
+"""
+
+import gzip
+import heapq
+import inspect
+import sys
+import time
+from array import array
+
+from main7 import decode_metar
+
+MINUTES_WRAP = 31 * 24 * 60
+
+
+def read_archive(paths):
+    """Генератор строк-сводок из файлов по порядку; пустые строки пропускаются."""
+    for path in paths:
+        opener = gzip.open if str(path).endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8', errors='replace') as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield line
+
+
+class LatencyStats:
+    """Задержки декодирования за последние capacity сводок (кольцевой буфер)."""
+
+    def __init__(self, capacity: int = 10_000):
+        self.samples = array('d', [0.0]) * capacity
+        self.capacity = capacity
+        self.count = 0
+
+    def add(self, seconds: float):
+        self.samples[self.count % self.capacity] = seconds
+        self.count += 1
+
+    def percentiles(self, ps=(50, 90, 99)) -> dict:
+        n = min(self.count, self.capacity)
+        if not n:
+            return {}
+        data = sorted(self.samples[:n])
+        res = {f'p{p}_us': round(data[min(n - 1, n * p // 100)] * 1e6, 1) for p in ps}
+        res['max_us'] = round(data[-1] * 1e6, 1)
+        return res
+
+
+def print_sink(raw: str, text: str, data: dict):
+    time_raw = data.get('time', {}).get('raw', '------Z')
+    print(f"{time_raw} {raw}")
+
+
+def writer_sink(writer):
+    """Приёмник для объектов с write(data) / write(data, raw): JsonlWriter, SQLiteSink."""
+    if 'raw' in inspect.signature(writer.write).parameters:
+        return lambda raw, text, data: writer.write(data, raw)
+    return lambda raw, text, data: writer.write(data)
+
+
+class Replayer:
+    """
+    engine — функция сводка -> (текст, словарь) (по умолчанию main7.decode_metar);
+    sinks  — функции (сводка, текст, словарь);
+    speed  — во сколько раз быстрее реального времени (0 — без задержек);
+    window — число сводок в окне упорядочивания по времени наблюдения.
+    """
+
+    def __init__(self, sinks, engine=decode_metar, speed: float = 0.0, window: int = 1000,
+                 report_every: float = 5.0, log=sys.stderr):
+        self.sinks = list(sinks)
+        self.engine = engine
+        self.speed = speed
+        self.window = window
+        self.report_every = report_every
+        self.log = log
+        self.latency = LatencyStats()
+        self.decoded = 0
+        self.emitted = 0
+        self.failed = 0
+        self._heap = []
+        self._seq = 0
+        self._month_base = 0
+        self._max_key = None
+        self._clock = None
+
+    def _time_key(self, data: dict):
+        """
+        Минута наблюдения с учётом перехода через границу месяца (None — нет времени).
+        Опорой служит наибольший выданный ключ: скачок назад больше чем на полмесяца —
+        начало следующего месяца, скачок вперёд больше чем на полмесяца — опоздавшая
+        сводка предыдущего месяца (312355Z после 010000Z).
+        """
+        tm = data.get('time')
+        if not tm:
+            return None
+        key = tm['day'] * 1440 + tm['hour'] * 60 + tm['minute'] + self._month_base
+        if self._max_key is not None:
+            if self._max_key - key > MINUTES_WRAP // 2:
+                self._month_base += MINUTES_WRAP
+                key += MINUTES_WRAP
+            elif key - self._max_key > MINUTES_WRAP // 2:
+                key -= MINUTES_WRAP
+        if self._max_key is None or key > self._max_key:
+            self._max_key = key
+        return key
+
+    def _emit(self, key, raw, text, data):
+        if self.speed and key is not None:
+            if self._clock is None:
+                self._clock = (key, time.perf_counter())
+            first_key, start = self._clock
+            delay = start + (key - first_key) * 60 / self.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        for sink in self.sinks:
+            sink(raw, text, data)
+        self.emitted += 1
+
+    def _report(self, started: float, final: bool = False):
+        if self.log is None:
+            return
+        dt = time.perf_counter() - started
+        stats = self.latency.percentiles()
+        print(f"{'итог' if final else 'ход'}: декодировано {self.decoded}, выдано {self.emitted}, "
+              f"ошибок {self.failed}, {self.decoded / dt if dt else 0:,.0f} сводок/с, "
+              f"задержка декодирования {stats}", file=self.log)
+
+    def run(self, lines) -> dict:
+        started = last_report = time.perf_counter()
+        perf = time.perf_counter
+        for raw in lines:
+            t0 = perf()
+            try:
+                text, data = self.engine(raw)
+            except Exception:
+                self.failed += 1
+                continue
+            self.latency.add(perf() - t0)
+            self.decoded += 1
+            key = self._time_key(data)
+            # Сводки без времени выдаются сразу после предыдущих по порядку
+            sort_key = key if key is not None else (self._max_key or 0)
+            heapq.heappush(self._heap, (sort_key, self._seq, key, raw, text, data))
+            self._seq += 1
+            if len(self._heap) > self.window:
+                _, _, k, r, tx, d = heapq.heappop(self._heap)
+                self._emit(k, r, tx, d)
+            if self.report_every and perf() - last_report >= self.report_every:
+                self._report(started)
+                last_report = perf()
+        while self._heap:
+            _, _, k, r, tx, d = heapq.heappop(self._heap)
+            self._emit(k, r, tx, d)
+        self._report(started, final=True)
+        elapsed = time.perf_counter() - started
+        return {
+            'decoded': self.decoded, 'emitted': self.emitted, 'failed': self.failed,
+            'seconds': round(elapsed, 3),
+            'reports_per_second': round(self.decoded / elapsed, 1) if elapsed else None,
+            'latency': self.latency.percentiles(),
+        }
+
+
+# ==============================
+# Запуск из командной строки
+# ==============================
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Воспроизведение архива METAR")
+    parser.add_argument('archives', nargs='*')
+    parser.add_argument('--speed', type=float, default=0.0, help="ускорение (0 — без задержек)")
+    parser.add_argument('--window', type=int, default=1000)
+    parser.add_argument('--out', help="файл .jsonl или .sqlite; по умолчанию — печать")
+    parser.add_argument('--engine', choices=('python', 'accel'), default='python')
+    args = parser.parse_args()
+
+    if not args.archives:
+        # Небольшой архив для демонстрации: вперемешку по времени
+        path = os.path.join(tempfile.gettempdir(), 'metar_replay_demo.txt')
+        with open(path, 'w', encoding='utf-8') as fh:
+            for hh in (12, 13, 11, 14):
+                fh.write(f"METAR ULLI 10{hh}00Z 23002MPS 9999 SCT020 M01/M03 Q1009=\n")
+                fh.write(f"METAR UUEE 10{hh}30Z 18003MPS CAVOK 02/M04 Q1015=\n")
+        args.archives = [path]
+        args.speed = args.speed or 3600.0
+
+    engine = decode_metar
+    if args.engine == 'accel':
+        from metar_accel import decode_metar as engine
+
+    closers = []
+    if args.out and args.out.endswith('.sqlite'):
+        from metar_sqlite_sink import SQLiteSink
+        writer = SQLiteSink(args.out)
+        sinks = [writer_sink(writer)]
+        closers.append(writer.close)
+    elif args.out:
+        from metar_json import JsonlWriter
+        writer = JsonlWriter(args.out)
+        sinks = [writer_sink(writer)]
+        closers.append(writer.close)
+    else:
+        sinks = [print_sink]
+
+    # Опоздавшая сводка прошлого месяца после перехода через границу месяца
+    probe = Replayer([], log=None)
+    keys = [probe._time_key({'time': {'day': d, 'hour': h, 'minute': m}})
+            for d, h, m in ((31, 23, 50), (1, 0, 0), (31, 23, 55), (1, 0, 30))]
+    assert keys[0] < keys[2] < keys[1] < keys[3] and probe._month_base == MINUTES_WRAP, (keys, probe._month_base)
+
+    replayer = Replayer(sinks, engine=engine, speed=args.speed, window=args.window)
+    try:
+        summary = replayer.run(read_archive(args.archives))
+    finally:
+        for close in closers:
+            close()
+    print(summary, file=sys.stderr)
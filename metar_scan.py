@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка и замеры сканеров групп main7 (см. main7.SCANNERS).
+Для каждой группы генерируются случайные токены — корректные, изменённые
+(замена, вставка, удаление символа) и произвольные — и сравниваются результаты
+сканера и эталонного разбора регулярным выражением; декодер целиком сравнивается
+в обоих режимах. Проверка не требует ввода и завершается с кодом 1 при расхождении,
+поэтому её можно запускать после каждого изменения разбора; verify() — то же из кода.
+
+Группы из REGEX_PREFERRED декодер разбирает регулярными выражениями.
+
+    python metar_scan.py [check|bench] [-n число токенов на группу] [--seed N]
+"""
+
+import random
+import timeit
+
+from main7 import SCANNERS, REGEX_PREFERRED, decode_metar, set_scanners
+
+# Символы для мутаций: цифры (в т.ч. не-ASCII десятичные), буквы групп, разделители
+ALPHABET = '0123456789/GVMPQAZNSEWKTHCBOFRLXYD ٣'
+
+
+def _digits(rnd, n):
+    return ''.join(rnd.choice('0123456789') for _ in range(n))
+
+
+# Генераторы корректных токенов по группам
+GENERATORS = {
+    'time': lambda r: _digits(r, 6) + 'Z',
+    'wind': lambda r: (r.choice(['VRB', '000', _digits(r, 3)]) + _digits(r, r.choice((2, 3)))
+                       + (('G' + _digits(r, r.choice((2, 3)))) if r.random() < 0.4 else '')
+                       + r.choice(['', 'KT', 'MPS', 'KMH'])),
+    'vis': lambda r: _digits(r, 4) + r.choice(['', 'N', 'SE', 'NW', 'E']),
+    'cloud': lambda r: (r.choice(['FEW', 'SCT', 'BKN', 'OVC', 'NSC', 'SKC', 'CLR', 'CAVOK'])
+                        + r.choice(['', '///', _digits(r, 3)]) + r.choice(['', 'CB', 'TCU'])),
+    'temp': lambda r: '/'.join(r.choice(['//', _digits(r, 2), 'M' + _digits(r, 2)]) for _ in range(2)),
+    'qnh': lambda r: 'Q' + _digits(r, 4),
+    'altimeter': lambda r: 'A' + _digits(r, 4),
+}
+
+
+def mutate(rnd, tok: str) -> str:
+    k = rnd.randrange(len(tok) + 1)
+    op = rnd.randrange(3)
+    if op == 0 and tok:
+        return tok[:k] + rnd.choice(ALPHABET) + tok[k + 1:]
+    if op == 1:
+        return tok[:k] + rnd.choice(ALPHABET) + tok[k:]
+    return tok[:k] + tok[k + 1:]
+
+
+def sample_tokens(name: str, n: int, rnd) -> list[str]:
+    gen = GENERATORS[name]
+    tokens = []
+    for _ in range(n):
+        x = rnd.random()
+        if x < 0.4:
+            tok = gen(rnd)
+        elif x < 0.85:
+            tok = gen(rnd)
+            for _ in range(rnd.randint(1, 2)):
+                tok = mutate(rnd, tok)
+        else:
+            tok = ''.join(rnd.choice(ALPHABET) for _ in range(rnd.randint(0, 9)))
+        tokens.append(tok)
+    # Все группы разбора встречаются в одном цикле декодера, поэтому
+    # сканер проверяется и на токенах чужих групп
+    tokens.extend(g(rnd) for g in GENERATORS.values())
+    return tokens
+
+
+def check(name: str, tokens: list[str]) -> int:
+    """Число совпадающих по принятию токенов; при расхождении — AssertionError."""
+    scanner, regex = SCANNERS[name]
+    accepted = 0
+    for tok in tokens:
+        a, b = scanner(tok), regex(tok)
+        assert a == b, f"{name}: {tok!r}: сканер {a!r}, регулярное выражение {b!r}"
+        accepted += a is not None
+    return accepted
+
+
+# Сводки для сравнения декодера целиком
+CORPUS = [
+    "METAR ULMM 261330Z 22005G12MPS 180V250 9999 -SHRASN BKN028CB 03/M02 Q1000 R13/290051 NOSIG RMK QFE744=",
+    "METAR ULLI 191700Z 29008MPS 2200 0900SE R28L/1900U R28R/2000U +SHSN BLSN SCT011 BKN019CB OVC033 M06/M07 Q0996 R28L/452030 R28R/490535 BECMG 6000 NSW=",
+    "METAR KJFK 261351Z 31015G25KT 1 1/2SM -RA BR FEW008 OVC015 12/10 A2992 RMK AO2 SLP132 T01220100",
+    "METAR UUUU 201000Z 24015G25KT 2000 +TSRASNGR BKN015CB 01/00 Q0998",
+    "METAR ULLI 101330Z 00000MPS CAVOK ///// Q1009=",
+]
+
+
+def _group_tokens(n: int, seed: int) -> dict:
+    rnd = random.Random(seed)
+    other = [g(rnd) for g in GENERATORS.values() for _ in range(200)]
+    return {name: sample_tokens(name, n, rnd) + other for name in SCANNERS}
+
+
+def verify(n: int = 20_000, seed: int = 1) -> dict:
+    """
+    Сверка сканеров с регулярными выражениями на n случайных токенах каждой группы
+    и декодера целиком на CORPUS в обоих режимах. Возвращает {группа: принято};
+    при расхождении — AssertionError. Режим декодера после проверки — сканеры.
+    """
+    accepted = {name: check(name, tokens) for name, tokens in _group_tokens(n, seed).items()}
+    try:
+        set_scanners(False)
+        reference = [decode_metar(s) for s in CORPUS]
+        set_scanners(True)
+        for s, ref in zip(CORPUS, reference):
+            assert decode_metar(s) == ref, f"decode_metar расходится: {s}"
+    finally:
+        set_scanners(True)
+    return accepted
+
+
+def benchmark(n: int = 50_000, seed: int = 1):
+    print(f"{'группа':<10} {'принято':>9} {'сканер':>14} {'regex':>14} {'ускорение':>10}")
+    for name, tokens in _group_tokens(n, seed).items():
+        accepted = check(name, tokens)
+        scanner, regex = SCANNERS[name]
+        t_scan = min(timeit.repeat(lambda: [scanner(t) for t in tokens], number=1, repeat=3))
+        t_re = min(timeit.repeat(lambda: [regex(t) for t in tokens], number=1, repeat=3))
+        mark = ' (regex)' if name in REGEX_PREFERRED else ''
+        print(f"{name:<10} {accepted:>9} {len(tokens) / t_scan:>12,.0f}/с "
+              f"{len(tokens) / t_re:>12,.0f}/с {t_re / t_scan:>9.2f}x{mark}")
+
+    corpus = CORPUS * 500
+    timings = {}
+    try:
+        for enabled in (False, True):
+            set_scanners(enabled)
+            timings[enabled] = min(timeit.repeat(lambda: [decode_metar(s) for s in corpus], number=1, repeat=3))
+    finally:
+        set_scanners(True)
+    print(f"decode_metar: regex {len(corpus) / timings[False]:,.0f}/с, "
+          f"сканеры {len(corpus) / timings[True]:,.0f}/с ({timings[False] / timings[True]:.2f}x)")
+
+
+# ==============================
+# Запуск из командной строки
+# ==============================
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Проверка и замеры сканеров групп main7")
+    parser.add_argument('mode', nargs='?', choices=('check', 'bench'), default='check')
+    parser.add_argument('-n', type=int, default=None, help="токенов на группу")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.mode == 'bench':
+        benchmark(args.n or 50_000, args.seed)
+        sys.exit(0)
+    try:
+        accepted = verify(args.n or 20_000, args.seed)
+    except AssertionError as exc:
+        print(f"ОШИБКА: {exc}", file=sys.stderr)
+        sys.exit(1)
+    print("сканеры совпадают с регулярными выражениями:", accepted)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Запись результатов decode_metar в SQLite.
+Словарь сводки раскладывается по нормализованной схеме (сводка, облака, явления,
+состояние ВПП, RVR, тренды, ремарки) и пишется пакетами: одна транзакция и
+один executemany на таблицу для каждого пакета.
+"""
+
+import json
+import sqlite3
+
+from main7 import decode_metar, observation_minute, trend_validity, visibility_meters
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id              INTEGER PRIMARY KEY,
+    station         TEXT,
+    day             INTEGER,
+    hour            INTEGER,
+    minute          INTEGER,
+    correction      TEXT,
+    raw             TEXT,
+    wind_direction  INTEGER,
+    wind_variable   INTEGER,
+    wind_speed      INTEGER,
+    wind_gust       INTEGER,
+    wind_unit       TEXT,
+    wind_var_from   INTEGER,
+    wind_var_to     INTEGER,
+    visibility_m    INTEGER,
+    visibility_min_m INTEGER,
+    vertical_visibility_m INTEGER,
+    air_celsius     INTEGER,
+    dew_point_celsius INTEGER,
+    qnh_hpa         INTEGER,
+    altimeter_inhg  REAL,
+    remarks_raw     TEXT,
+    unknown         TEXT
+);
+CREATE TABLE IF NOT EXISTS clouds (
+    report_id INTEGER NOT NULL REFERENCES reports(id),
+    block     INTEGER NOT NULL,
+    seq       INTEGER NOT NULL,
+    code      TEXT,
+    height_ft INTEGER,
+    type      TEXT
+);
+CREATE TABLE IF NOT EXISTS weather (
+    report_id INTEGER NOT NULL REFERENCES reports(id),
+    block     INTEGER NOT NULL,
+    seq       INTEGER NOT NULL,
+    raw       TEXT,
+    decoded_text TEXT
+);
+CREATE TABLE IF NOT EXISTS runway_state (
+    report_id INTEGER NOT NULL REFERENCES reports(id),
+    block     INTEGER NOT NULL,
+    seq       INTEGER NOT NULL,
+    raw       TEXT,
+    runway    TEXT,
+    deposit   TEXT,
+    coverage  TEXT,
+    depth_mm  INTEGER,
+    braking_code TEXT,
+    friction  REAL,
+    closed    INTEGER,
+    cleared   INTEGER
+);
+CREATE TABLE IF NOT EXISTS rvr (
+    report_id INTEGER NOT NULL REFERENCES reports(id),
+    block     INTEGER NOT NULL,
+    runway    TEXT,
+    value_raw TEXT,
+    value_max TEXT,
+    trend     TEXT,
+    unit      TEXT
+);
+CREATE TABLE IF NOT EXISTS trends (
+    report_id INTEGER NOT NULL REFERENCES reports(id),
+    block     INTEGER NOT NULL,
+    code      TEXT,
+    start_min INTEGER,
+    end_min   INTEGER,
+    wind_speed INTEGER,
+    wind_gust INTEGER,
+    wind_unit TEXT,
+    visibility_m INTEGER
+);
+CREATE TABLE IF NOT EXISTS remarks (
+    report_id INTEGER NOT NULL REFERENCES reports(id),
+    seq       INTEGER NOT NULL,
+    code      TEXT,
+    description TEXT,
+    data      TEXT
+);
+"""
+
+# Индексы создаются отдельно: при первичной загрузке их можно построить после вставки
+INDEXES = """
+CREATE INDEX IF NOT EXISTS reports_station_time ON reports (station, day, hour, minute);
+CREATE INDEX IF NOT EXISTS clouds_report ON clouds (report_id);
+CREATE INDEX IF NOT EXISTS weather_report ON weather (report_id);
+CREATE INDEX IF NOT EXISTS weather_raw ON weather (raw);
+CREATE INDEX IF NOT EXISTS runway_state_report ON runway_state (report_id);
+CREATE INDEX IF NOT EXISTS rvr_report ON rvr (report_id);
+CREATE INDEX IF NOT EXISTS trends_report ON trends (report_id);
+CREATE INDEX IF NOT EXISTS remarks_report ON remarks (report_id);
+"""
+
+SQL_INSERT = {
+    'reports': "INSERT INTO reports VALUES (" + ", ".join("?" * 23) + ")",
+    'clouds': "INSERT INTO clouds VALUES (?, ?, ?, ?, ?, ?)",
+    'weather': "INSERT INTO weather VALUES (?, ?, ?, ?, ?)",
+    'runway_state': "INSERT INTO runway_state VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    'rvr': "INSERT INTO rvr VALUES (?, ?, ?, ?, ?, ?, ?)",
+    'trends': "INSERT INTO trends VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    'remarks': "INSERT INTO remarks VALUES (?, ?, ?, ?, ?)",
+}
+
+
+def _block_rows(rows: dict, rid: int, block_no: int, block: dict):
+    """Строки дочерних таблиц для одного блока (0 — основной, 1.. — тренды)."""
+    for seq, c in enumerate(block.get('clouds', ())):
+        rows['clouds'].append((rid, block_no, seq, c['code'], c['height_ft'], c['type']))
+    for seq, w in enumerate(block.get('weather', ())):
+        rows['weather'].append((rid, block_no, seq, w['raw'], w['decoded_text']))
+    for seq, r in enumerate(block.get('runway_state', ())):
+        rows['runway_state'].append((
+            rid, block_no, seq, r['raw'], r.get('runway'), r.get('deposit'), r.get('coverage'),
+            r.get('depth_mm'), r.get('braking_code'), r.get('friction'),
+            int(bool(r.get('closed'))), int(bool(r.get('cleared')))))
+    for r in block.get('rvr', ()):
+        rows['rvr'].append((rid, block_no, r['runway'], r['value_raw'], r['value_max'], r['trend'],
+                            r.get('unit', 'M')))
+
+
+def report_rows(rid: int, data: dict, raw: str | None = None) -> dict:
+    """Раскладывает словарь decode_metar на строки таблиц схемы."""
+    rows = {name: [] for name in SQL_INSERT}
+    wind = data.get('wind', {})
+    var = wind.get('variability', {})
+    time = data.get('time', {})
+    temp = data.get('temperature', {})
+    pressure = data.get('pressure', {})
+    vv = data.get('vertical_visibility', {})
+    vis, vis_min = visibility_meters(data)
+    direction = wind.get('direction')
+    rows['reports'].append((
+        rid, data.get('station', {}).get('code'), time.get('day'), time.get('hour'), time.get('minute'),
+        data.get('correction'), raw,
+        direction if direction != 'VRB' else None, int(direction == 'VRB'),
+        wind.get('speed'), wind.get('gust'), wind.get('unit'), var.get('from'), var.get('to'),
+        vis, vis_min, vv.get('height_m'),
+        temp.get('air_celsius'), temp.get('dew_point_celsius'),
+        pressure.get('qnh_hpa'), pressure.get('altimeter_inhg'),
+        data.get('remarks', {}).get('raw'),
+        ' '.join(data['unknown']) if 'unknown' in data else None,
+    ))
+    _block_rows(rows, rid, 0, data)
+    obs = observation_minute(data)
+    for block_no, block in enumerate(data.get('trend', ()), 1):
+        bwind = block.get('wind', {})
+        bvis, _ = visibility_meters(block)
+        validity = block.get('validity') or trend_validity(block, obs)
+        rows['trends'].append((rid, block_no, block.get('code'), validity.get('start_min'),
+                               validity.get('end_min'), bwind.get('speed'), bwind.get('gust'),
+                               bwind.get('unit'), bvis))
+        _block_rows(rows, rid, block_no, block)
+    for seq, rm in enumerate(data.get('remarks', {}).get('decoded', ())):
+        extra = {k: v for k, v in rm.items() if k not in ('code', 'description')}
+        rows['remarks'].append((rid, seq, rm.get('code'), rm.get('description'),
+                                json.dumps(extra, ensure_ascii=False) if extra else None))
+    return rows
+
+
+class SQLiteSink:
+    """
+    Пакетный приёмник. write() копит строки в памяти и сбрасывает их
+    одной транзакцией при достижении batch_size; flush()/close() сбрасывают остаток.
+    """
+
+    def __init__(self, path: str, batch_size: int = 5000, create_indexes: bool = True):
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Базы, созданные до появления единицы RVR (футы в профиле FAA)
+        if 'unit' not in {row[1] for row in self.conn.execute("PRAGMA table_info(rvr)")}:
+            self.conn.execute("ALTER TABLE rvr ADD COLUMN unit TEXT DEFAULT 'M'")
+        if create_indexes:
+            self.conn.executescript(INDEXES)
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self._next_id = (self.conn.execute("SELECT MAX(id) FROM reports").fetchone()[0] or 0) + 1
+        self._pending = {name: [] for name in SQL_INSERT}
+        self._pending_reports = 0
+
+    def write(self, data: dict, raw: str | None = None) -> int:
+        """Добавляет словарь сводки в пакет; возвращает присвоенный id сводки."""
+        rid = self._next_id
+        self._next_id += 1
+        for name, rows in report_rows(rid, data, raw).items():
+            self._pending[name].extend(rows)
+        self._pending_reports += 1
+        if self._pending_reports >= self.batch_size:
+            self.flush()
+        return rid
+
+    def write_many(self, items):
+        """items — итерируемое (raw, словарь) или словарей."""
+        for item in items:
+            if isinstance(item, tuple):
+                self.write(item[1], item[0])
+            else:
+                self.write(item)
+
+    def flush(self):
+        if not self._pending_reports:
+            return
+        with self.conn:
+            self.conn.execute("BEGIN")
+            for name, rows in self._pending.items():
+                if rows:
+                    self.conn.executemany(SQL_INSERT[name], rows)
+                    self.rows_written += len(rows)
+                    rows.clear()
+        self._pending_reports = 0
+
+    def create_indexes(self):
+        self.conn.executescript(INDEXES)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ==============================
+# Бенчмарк загрузчика
+# ==============================
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    import time
+
+    samples = [
+        "METAR ULMM 261330Z 22005G12MPS 180V250 9999 -SHRASN BKN028CB 03/M02 Q1000 R13/290051 NOSIG RMK QFE744=",
+        "METAR ULLI 101330Z 23002MPS 5000 -SHSN SCT006 BKN020CB OVC036 M01/M01 Q1009 RESHSN R28L/550539 R28R/590537 TEMPO 0800 +SHSN FZRA BKN004 BKN016CB RMK OBST OBSC=",
+        "METAR ULLI 191700Z 29008MPS 2200 0900SE R28L/1900U R28R/2000U +SHSN BLSN SCT011 BKN019CB OVC033 M06/M07 Q0996 R28L/452030 R28R/490535 BECMG 6000 NSW=",
+        "METAR URMM 021630Z 11005MPS 4400 -SHRA BR BKN004 OVC021CB 12/11 Q1023 R11/190060 TEMPO 0300 -SHRA FG BKN002 BKN030CB RMK MT OBSC OBST OBSC QFE739/0986",
+    ]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    decoded = [(s, decode_metar(s)[1]) for s in samples]
+    items = [decoded[k % len(decoded)] for k in range(n)]
+
+    path = os.path.join(tempfile.gettempdir(), 'metar_sink_bench.sqlite')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    t0 = time.perf_counter()
+    with SQLiteSink(path) as sink:
+        sink.write_many(items)
+    # rows_written учитывает и последнюю порцию, записанную при закрытии
+    rows = sink.rows_written
+    dt = time.perf_counter() - t0
+    print(f"{n} сводок, {rows} строк за {dt:.2f} с: "
+          f"{n / dt:,.0f} сводок/с, {rows / dt:,.0f} строк/с")
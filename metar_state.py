@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Состояние станций для потокового декодирования.
+Для каждой станции хранятся последние N сводок, действующее состояние ВПП
+(для разрешения групп R99 — «повтор из предыдущего сообщения») и текущие условия.
+Число станций ограничено: при переполнении вытесняется станция, дольше всех не обновлявшаяся.
+decode_metar(..., state=store) обращается к хранилищу и обновляет его.
+"""
+
+from collections import OrderedDict, deque
+
+from main7 import block_conditions, trend_conditions
+
+
+class StationState:
+    """Состояние одной станции; размер ограничен history сводками."""
+
+    __slots__ = ('reports', 'runways', 'current', 'nosig')
+
+    def __init__(self, history: int):
+        self.reports = deque(maxlen=history)
+        # Действующие записи состояния ВПП (без групп-повторов R99)
+        self.runways = ()
+        self.current = None
+        self.nosig = False
+
+
+class StationStateStore:
+    """
+    Хранилище состояний: O(1) доступ к текущим условиям станции,
+    вытеснение по давности обновления (LRU) при превышении max_stations.
+    """
+
+    def __init__(self, max_stations: int = 20000, history: int = 6):
+        self.max_stations = max_stations
+        self.history = history
+        self._stations = OrderedDict()
+
+    def __len__(self):
+        return len(self._stations)
+
+    def __contains__(self, code):
+        return code in self._stations
+
+    def get(self, code: str) -> StationState | None:
+        return self._stations.get(code)
+
+    def previous_runways(self, code: str) -> tuple:
+        """Записи состояния ВПП из последней сводки станции (для R99)."""
+        st = self._stations.get(code)
+        return st.runways if st is not None else ()
+
+    def update(self, metar_data: dict):
+        """Учитывает декодированную сводку: история, состояние ВПП, текущие условия."""
+        code = metar_data.get('station', {}).get('code')
+        if code is None:
+            return
+        st = self._stations.get(code)
+        if st is None:
+            st = self._stations[code] = StationState(self.history)
+            if len(self._stations) > self.max_stations:
+                self._stations.popitem(last=False)
+        else:
+            self._stations.move_to_end(code)
+
+        runways = []
+        for rec in metar_data.get('runway_state', ()):
+            if rec.get('repeat'):
+                runways.extend(rec.get('repeat_of', ()))
+            elif 'kind' in rec:
+                runways.append(rec)
+        if runways or 'runway_state' in metar_data:
+            st.runways = tuple(runways)
+
+        st.reports.append(metar_data)
+        st.current = block_conditions(metar_data)
+        st.nosig = any(b.get('code') == 'NOSIG' for b in metar_data.get('trend', ()))
+
+    def current(self, code: str) -> dict | None:
+        """Текущие условия станции (см. block_conditions) или None."""
+        st = self._stations.get(code)
+        return st.current if st is not None else None
+
+    def expected(self, code: str, mode: str = 'worst') -> dict | None:
+        """
+        Условия на ближайшие 2 часа по последней сводке. При NOSIG совпадают с текущими
+        (изменений не ожидается); иначе учитываются тренды (см. trend_conditions).
+        """
+        st = self._stations.get(code)
+        if st is None:
+            return None
+        if st.nosig:
+            return st.current
+        return trend_conditions(st.reports[-1], mode)
+
+    def history_of(self, code: str) -> list[dict]:
+        st = self._stations.get(code)
+        return list(st.reports) if st is not None else []
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    import sys
+    import time
+    import tracemalloc
+
+    from main7 import decode_metar
+
+    store = StationStateStore(max_stations=3, history=3)
+    for s in [
+        "METAR ULLI 191700Z 29008MPS 2200 +SHSN BKN019CB M06/M07 Q0996 R28L/452030 R28R/490535 NOSIG=",
+        "METAR ULLI 191730Z 29007MPS 3000 -SHSN BKN020CB M06/M07 Q0997 R99/999999 NOSIG=",
+    ]:
+        text, data = decode_metar(s, state=store)
+        print(text, end="\n\n")
+    print("текущие:", store.current('ULLI'))
+    print("ожидаемые:", store.expected('ULLI'))
+
+    # Устойчивость памяти при большом числе станций
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 12_000
+    store = StationStateStore(max_stations=10_000, history=4)
+    base = decode_metar("METAR ULLI 191700Z 29008MPS 9999 BKN019 M06/M07 Q0996 R28L/452030 NOSIG=")[1]
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for rnd in range(3):
+        for k in range(n):
+            data = dict(base, station={'code': f"X{k:05d}"})
+            store.update(data)
+        print(f"проход {rnd + 1}: станций {len(store)}, память {tracemalloc.get_traced_memory()[0] / 1e6:.1f} МБ")
+    print(f"{3 * n / (time.perf_counter() - t0):,.0f} обновлений/с")
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Справочник станций: координаты и высота аэродрома по индексу ИКАО.
+Таблица хранится в плоских массивах (array('d')) с индексом код -> номер строки,
+может быть сохранена в двоичный файл и открыта через mmap без разбора CSV.
+Поддерживает поиск станций в радиусе и обогащение словаря decode_metar.
+"""
+
+import csv
+import math
+import mmap
+import struct
+from array import array
+
+EARTH_RADIUS_KM = 6371.0088
+FT_TO_M = 0.3048
+# Размер ячейки пространственного индекса, градусы
+GRID_DEG = 1.0
+
+# Двоичный формат: заголовок (сигнатура, число станций), N кодов по 4 байта
+# (с дополнением до кратного 8), затем три массива float64 по N значений: широта, долгота, высота (м).
+BIN_MAGIC = b'MSTA0001'
+BIN_HEADER = struct.Struct('<8sQ')
+
+# Допустимые названия колонок CSV (в т.ч. формат OurAirports)
+CSV_COLUMNS = {
+    'code': ('icao', 'ident', 'code', 'station', 'gps_code'),
+    'lat': ('lat', 'latitude', 'latitude_deg'),
+    'lon': ('lon', 'lng', 'longitude', 'longitude_deg'),
+    'elev_m': ('elev_m', 'elevation_m'),
+    'elev_ft': ('elev_ft', 'elevation_ft'),
+}
+
+
+def _padded(size: int) -> int:
+    """Блок кодов дополняется до кратного 8, чтобы массивы float64 были выровнены."""
+    return (size + 7) // 8 * 8
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def qnh_from_qfe(qfe_hpa: float, elevation_m: float) -> float:
+    """Приведение QFE к уровню моря по стандартной атмосфере."""
+    return qfe_hpa * (1 - 0.0065 * elevation_m / 288.15) ** -5.25588
+
+
+class StationRegistry:
+    """Индекс станций: O(1) поиск по коду, поиск в радиусе по сетке GRID_DEG."""
+
+    def __init__(self, codes, lat, lon, elev_m):
+        self.codes = list(codes)
+        self.lat = lat
+        self.lon = lon
+        self.elev_m = elev_m
+        self.index = {code: n for n, code in enumerate(self.codes)}
+        self._grid = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    # ---------- загрузка и сохранение ----------
+    @classmethod
+    def from_rows(cls, rows):
+        """rows — итерируемое (код, широта, долгота, высота_м)."""
+        codes, lat, lon, elev = [], array('d'), array('d'), array('d')
+        for code, la, lo, el in rows:
+            codes.append(code)
+            lat.append(float(la))
+            lon.append(float(lo))
+            elev.append(float(el) if el not in (None, '') else math.nan)
+        return cls(codes, lat, lon, elev)
+
+    @classmethod
+    def from_csv(cls, path: str):
+        """CSV с заголовком; берутся только строки с 4-буквенным индексом."""
+        with open(path, newline='', encoding='utf-8') as fh:
+            reader = csv.DictReader(fh)
+            fields = {name.lower(): name for name in reader.fieldnames or ()}
+            col = {key: next((fields[a] for a in aliases if a in fields), None)
+                   for key, aliases in CSV_COLUMNS.items()}
+            if not (col['code'] and col['lat'] and col['lon']):
+                raise ValueError(f"{path}: нет колонок кода/широты/долготы")
+
+            def rows():
+                for r in reader:
+                    code = r[col['code']].strip().upper()
+                    if len(code) != 4 or not code.isalpha():
+                        continue
+                    if col['elev_m'] and r[col['elev_m']]:
+                        elev = float(r[col['elev_m']])
+                    elif col['elev_ft'] and r[col['elev_ft']]:
+                        elev = float(r[col['elev_ft']]) * FT_TO_M
+                    else:
+                        elev = None
+                    yield code, r[col['lat']], r[col['lon']], elev
+            return cls.from_rows(rows())
+
+    def save(self, path: str):
+        """Сохраняет индекс в двоичный файл для открытия через open_binary()."""
+        with open(path, 'wb') as fh:
+            fh.write(BIN_HEADER.pack(BIN_MAGIC, len(self.codes)))
+            codes = ''.join(self.codes).encode('ascii')
+            fh.write(codes.ljust(_padded(len(codes)), b'\0'))
+            for arr in (self.lat, self.lon, self.elev_m):
+                array('d', arr).tofile(fh)
+
+    @classmethod
+    def open_binary(cls, path: str):
+        """Открывает двоичный файл через mmap: массивы не копируются в память процесса."""
+        with open(path, 'rb') as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n = BIN_HEADER.unpack_from(mm, 0)
+        if magic != BIN_MAGIC:
+            raise ValueError(f"{path}: неизвестный формат справочника станций")
+        off = BIN_HEADER.size
+        raw_codes = mm[off:off + 4 * n].decode('ascii')
+        codes = [raw_codes[k:k + 4] for k in range(0, 4 * n, 4)]
+        off += _padded(4 * n)
+        views = []
+        for _ in range(3):
+            views.append(memoryview(mm)[off:off + 8 * n].cast('d'))
+            off += 8 * n
+        registry = cls(codes, *views)
+        registry._mmap = mm
+        return registry
+
+    # ---------- поиск ----------
+    def get(self, code: str):
+        """(широта, долгота, высота_м) или None."""
+        n = self.index.get(code)
+        if n is None:
+            return None
+        return self.lat[n], self.lon[n], self.elev_m[n]
+
+    def _build_grid(self):
+        grid = {}
+        for n in range(len(self.codes)):
+            key = (math.floor(self.lat[n] / GRID_DEG), math.floor(self.lon[n] / GRID_DEG))
+            grid.setdefault(key, []).append(n)
+        self._grid = grid
+
+    def within(self, lat: float, lon: float, radius_km: float) -> list[tuple[str, float]]:
+        """Станции в радиусе radius_km: список (код, расстояние км) по возрастанию расстояния."""
+        if self._grid is None:
+            self._build_grid()
+        dlat = radius_km / 111.0 / GRID_DEG
+        coslat = max(math.cos(math.radians(lat)), 1e-6)
+        dlon = min(radius_km / (111.0 * coslat) / GRID_DEG, 360 / GRID_DEG)
+        cy, cx = math.floor(lat / GRID_DEG), math.floor(lon / GRID_DEG)
+        ny, nx = math.ceil(dlat), math.ceil(dlon)
+        cells_x = int(360 / GRID_DEG)
+        # Долгота по кругу: ячейки за ±180° переносятся, каждая берётся один раз
+        columns = {(gx + cells_x // 2) % cells_x - cells_x // 2 for gx in range(cx - nx, cx + nx + 1)}
+        found = []
+        for gy in range(cy - ny, cy + ny + 1):
+            for gx in columns:
+                for n in self._grid.get((gy, gx), ()):
+                    d = haversine_km(lat, lon, self.lat[n], self.lon[n])
+                    if d <= radius_km:
+                        found.append((self.codes[n], round(d, 1)))
+        found.sort(key=lambda x: x[1])
+        return found
+
+    def near_station(self, code: str, radius_km: float) -> list[tuple[str, float]]:
+        pos = self.get(code)
+        if pos is None:
+            return []
+        return [x for x in self.within(pos[0], pos[1], radius_km) if x[0] != code]
+
+    # ---------- обогащение вывода декодера ----------
+    def enrich(self, metar_data: dict) -> bool:
+        """
+        Добавляет в словарь decode_metar координаты и высоту станции,
+        высоту нижней границы облаков над уровнем моря и сверку QFE/QNH.
+        Возвращает False, если станции нет в справочнике.
+        """
+        station = metar_data.get('station')
+        pos = self.get(station['code']) if station else None
+        if pos is None:
+            return False
+        lat, lon, elev = pos
+        station.update(lat=lat, lon=lon, elevation_m=None if math.isnan(elev) else round(elev, 1))
+        if math.isnan(elev):
+            return True
+
+        for c in metar_data.get('clouds', []):
+            if c.get('height_ft') is not None:
+                c['base_amsl_ft'] = round(c['height_ft'] + elev / FT_TO_M)
+
+        qnh = metar_data.get('pressure', {}).get('qnh_hpa')
+        for rm in metar_data.get('remarks', {}).get('decoded', []):
+            if 'mmhg' in rm and qnh is not None:
+                qfe_hpa = rm.get('hpa') or rm['mmhg'] * 1.333224
+                expected = qnh_from_qfe(qfe_hpa, elev)
+                station['qfe_qnh_check'] = {
+                    'qnh_from_qfe_hpa': round(expected, 1),
+                    'difference_hpa': round(qnh - expected, 1),
+                }
+                break
+        return True
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    import json
+    import os
+    import sys
+    import tempfile
+
+    from main7 import decode_metar
+
+    if len(sys.argv) > 1:
+        registry = StationRegistry.from_csv(sys.argv[1])
+    else:
+        registry = StationRegistry.from_rows([
+            ('ULLI', 59.8003, 30.2625, 24), ('ULLP', 59.9833, 29.6833, 9),
+            ('ULMM', 68.7817, 32.7508, 81), ('UUEE', 55.9728, 37.4147, 192),
+            ('URMM', 44.2251, 43.0819, 320), ('UUUU', 55.5600, 37.9800, 123),
+        ])
+    path = os.path.join(tempfile.gettempdir(), 'stations.bin')
+    registry.save(path)
+    registry = StationRegistry.open_binary(path)
+    print(f"{len(registry)} станций; в 50 км от ULLI: {registry.near_station('ULLI', 50)}")
+
+    _, data = decode_metar("METAR URMM 021630Z 11005MPS 4400 -SHRA BR BKN004 OVC021CB 12/11 Q1023 RMK QFE739/0986",
+                           stations=registry)
+    print(json.dumps(data['station'], ensure_ascii=False))
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Аналитика ветра по выходу decode_metar:
+  - встречная/боковая составляющие для таблицы курсов ВПП, пакетно;
+  - скользящая статистика по станциям (векторное среднее, коэффициент порывистости,
+    диапазон направлений), обновляемая инкрементально из потока сводок.
+Все скорости приводятся к м/с.
+"""
+
+import math
+from array import array
+from collections import deque
+
+from main7 import WIND_TO_MPS
+
+
+def runway_heading(name: str) -> float:
+    """Курс ВПП по её обозначению: '28L' -> 280°."""
+    return float(int(name[:2]) * 10 % 360 or 360)
+
+
+def wind_vector(wind: dict):
+    """(направление°, скорость м/с, порыв м/с|None) или None; направление None для VRB."""
+    if not wind or 'speed' not in wind:
+        return None
+    k = WIND_TO_MPS.get(wind['unit'], WIND_TO_MPS['KT'])
+    direction = None if wind['direction'] == 'VRB' else float(wind['direction'])
+    gust = wind['gust'] * k if wind['gust'] is not None else None
+    return direction, wind['speed'] * k, gust
+
+
+def _max_abs_sin(lo: float, hi: float) -> float:
+    """max |sin(x)| на дуге [lo, hi] (градусы, hi >= lo)."""
+    if hi - lo >= 180:
+        return 1.0
+    # |sin| максимален в точках 90 + 180k
+    k = math.ceil((lo - 90) / 180)
+    if 90 + 180 * k <= hi:
+        return 1.0
+    return max(abs(math.sin(math.radians(lo))), abs(math.sin(math.radians(hi))))
+
+
+def _min_cos(lo: float, hi: float) -> float:
+    """min cos(x) на дуге [lo, hi] (градусы): наихудшая (попутная) составляющая."""
+    if hi - lo >= 360:
+        return -1.0
+    k = math.ceil((lo - 180) / 360)
+    if 180 + 360 * k <= hi:
+        return -1.0
+    return min(math.cos(math.radians(lo)), math.cos(math.radians(hi)))
+
+
+def wind_columns(reports) -> tuple[array, array, array]:
+    """
+    Колонки пакета сводок: направление°, скорость и порыв (м/с) в array('d').
+    NaN — нет данных; для VRB направление NaN, скорость задана.
+    """
+    n = len(reports)
+    dirs, speeds, gusts = (array('d', [math.nan]) * n for _ in range(3))
+    for k, data in enumerate(reports):
+        vec = wind_vector(data.get('wind'))
+        if vec is None:
+            continue
+        if vec[0] is not None:
+            dirs[k] = vec[0]
+        speeds[k] = vec[1]
+        if vec[2] is not None:
+            gusts[k] = vec[2]
+    return dirs, speeds, gusts
+
+
+def runway_columns(dirs: array, speeds: array, heading_deg: float) -> tuple[array, array]:
+    """Встречная и боковая составляющие (м/с) для одного курса ВПП по колонкам wind_columns()."""
+    hs, hc = math.sin(math.radians(heading_deg)), math.cos(math.radians(heading_deg))
+    rad = math.radians
+    head = array('d', [s * (math.cos(rad(d)) * hc + math.sin(rad(d)) * hs) for d, s in zip(dirs, speeds)])
+    cross = array('d', [s * (math.sin(rad(d)) * hc - math.cos(rad(d)) * hs) for d, s in zip(dirs, speeds)])
+    return head, cross
+
+
+class RunwayWindTable:
+    """
+    Таблица курсов ВПП: {станция: {имя_ВПП: курс°}} (курс можно не задавать — берётся из имени).
+    components() возвращает составляющие ветра для пакета сводок.
+    """
+
+    def __init__(self, runways: dict):
+        self.runways = {}
+        for station, rwys in runways.items():
+            if isinstance(rwys, dict):
+                items = rwys.items()
+            else:
+                items = ((name, runway_heading(name)) for name in rwys)
+            # Заранее вычисленные sin/cos курса для каждой ВПП
+            self.runways[station] = [
+                (name, hdg, math.sin(math.radians(hdg)), math.cos(math.radians(hdg)))
+                for name, hdg in items
+            ]
+
+    def components(self, reports) -> list[dict]:
+        """
+        Для каждой сводки: {'station', 'runways': {ВПП: {...}}}, где для ВПП даны
+        headwind_mps (отрицательная — попутный), crosswind_mps (знак: + справа),
+        gust_crosswind_mps и наихудшие значения с учётом VRB и сектора dddVddd.
+        """
+        results = []
+        for data in reports:
+            station = data.get('station', {}).get('code')
+            table = self.runways.get(station, ())
+            vec = wind_vector(data.get('wind'))
+            out = {'station': station, 'runways': {}}
+            results.append(out)
+            if vec is None or not table:
+                continue
+            direction, speed, gust = vec
+            var = data['wind'].get('variability')
+            if direction is not None:
+                ws, wc = math.sin(math.radians(direction)), math.cos(math.radians(direction))
+            peak = gust if gust is not None else speed
+            for name, hdg, hs, hc in table:
+                rec = {}
+                if direction is not None:
+                    # cos/sin разности направлений через заранее вычисленные sin/cos
+                    cos_d = wc * hc + ws * hs
+                    sin_d = ws * hc - wc * hs
+                    rec['headwind_mps'] = round(speed * cos_d, 1)
+                    rec['crosswind_mps'] = round(speed * sin_d, 1)
+                    rec['gust_crosswind_mps'] = round(peak * abs(sin_d), 1)
+                if direction is None:
+                    worst_x, worst_h = 1.0, -1.0
+                elif var:
+                    lo = (var['from'] - hdg) % 360
+                    hi = lo + (var['to'] - var['from']) % 360
+                    worst_x, worst_h = _max_abs_sin(lo, hi), _min_cos(lo, hi)
+                else:
+                    worst_x, worst_h = abs(sin_d), cos_d
+                rec['worst_crosswind_mps'] = round(peak * worst_x, 1)
+                rec['worst_headwind_mps'] = round((peak if worst_h < 0 else speed) * worst_h, 1)
+                out['runways'][name] = rec
+        return results
+
+
+class WindStatistics:
+    """
+    Скользящие окна последних window наблюдений по каждой станции.
+    Суммы компонент обновляются за O(1) на сводку; память на станцию ограничена window.
+    """
+
+    def __init__(self, window: int = 12):
+        self.window = window
+        self._obs = {}
+        self._sums = {}
+
+    def update(self, metar_data: dict):
+        station = metar_data.get('station', {}).get('code')
+        vec = wind_vector(metar_data.get('wind'))
+        if station is None or vec is None:
+            return
+        direction, speed, gust = vec
+        if direction is not None and speed > 0:
+            # Метеонаправление "откуда": компоненты вектора в направлении, откуда дует
+            u = speed * math.sin(math.radians(direction))
+            v = speed * math.cos(math.radians(direction))
+        else:
+            # Штиль (00000KT/MPS, нулевая скорость) и VRB направления не имеют:
+            # в скорости учитываются, в среднее направление и диапазон — нет
+            direction = None
+            u = v = 0.0
+        obs = self._obs.get(station)
+        if obs is None:
+            obs = self._obs[station] = deque()
+            self._sums[station] = [0.0, 0.0, 0.0]
+        sums = self._sums[station]
+        if len(obs) == self.window:
+            ou, ov, ospd, _, _ = obs.popleft()
+            sums[0] -= ou; sums[1] -= ov; sums[2] -= ospd
+        obs.append((u, v, speed, gust, direction))
+        sums[0] += u; sums[1] += v; sums[2] += speed
+
+    def update_many(self, reports):
+        for data in reports:
+            self.update(data)
+
+    def stats(self, station: str) -> dict | None:
+        obs = self._obs.get(station)
+        if not obs:
+            return None
+        n = len(obs)
+        su, sv, sspd = self._sums[station]
+        mean_u, mean_v, mean_spd = su / n, sv / n, sspd / n
+        vec_spd = math.hypot(mean_u, mean_v)
+        gusts = [o[3] for o in obs if o[3] is not None]
+        max_gust = max(gusts) if gusts else None
+        return {
+            'count': n,
+            'vector_mean_direction': round(math.degrees(math.atan2(mean_u, mean_v)) % 360) if vec_spd > 1e-9 else None,
+            'vector_mean_speed_mps': round(vec_spd, 1),
+            'scalar_mean_speed_mps': round(mean_spd, 1),
+            # Постоянство ветра: 1 — направление не меняется, 0 — хаотичное
+            'steadiness': round(vec_spd / mean_spd, 2) if mean_spd > 0 else None,
+            'max_gust_mps': round(max_gust, 1) if max_gust is not None else None,
+            'gust_factor': round(max_gust / mean_spd, 2) if max_gust is not None and mean_spd > 0 else None,
+            'direction_range_deg': _direction_range([o[4] for o in obs if o[4] is not None]),
+        }
+
+
+def _direction_range(dirs: list) -> int | None:
+    """Наименьший сектор, содержащий все направления: 360 минус наибольший промежуток."""
+    if not dirs:
+        return None
+    d = sorted(x % 360 for x in dirs)
+    gaps = [b - a for a, b in zip(d, d[1:])] + [d[0] + 360 - d[-1]]
+    return round(360 - max(gaps))
+
+
+# ==============================
+# Демонстрационный блок
+# ==============================
+if __name__ == "__main__":
+    from main7 import decode_metar
+
+    table = RunwayWindTable({'ULLI': ['10L', '28R'], 'UUEE': {'06R': 63.0, '24L': 243.0}})
+    batch = [decode_metar(s)[1] for s in [
+        "METAR ULLI 261330Z 22005G12MPS 180V250 9999 BKN028CB 03/M02 Q1000=",
+        "METAR UUEE 261330Z 33010G20KT 9999 SCT030 10/02 Q1012=",
+        "METAR ULLI 261400Z VRB02MPS 9999 BKN028 03/M02 Q1000=",
+    ]]
+    for r in table.components(batch):
+        print(r)
+    dirs, speeds, _ = wind_columns(batch)
+    print("ВПП 28R:", [tuple(round(x, 1) for x in col) for col in runway_columns(dirs, speeds, 280.0)])
+
+    stats = WindStatistics(window=6)
+    for s in ["METAR ULLI 261200Z 20004MPS 9999", "METAR ULLI 261230Z 22006G11MPS 9999",
+              "METAR ULLI 261300Z 24005MPS 9999", "METAR ULLI 261330Z 35003MPS 9999"]:
+        stats.update(decode_metar(s)[1])
+    print(stats.stats('ULLI'))
+    # Штиль и VRB не расширяют диапазон направлений
+    before = stats.stats('ULLI')['direction_range_deg']
+    for s in ["METAR ULLI 261400Z 00000MPS 9999", "METAR ULLI 261430Z VRB01MPS 9999"]:
+        stats.update(decode_metar(s)[1])
+    print(stats.stats('ULLI'))
+    assert stats.stats('ULLI')['direction_range_deg'] == before